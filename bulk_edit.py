@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Formula-based bulk edits of numeric team fields.
+
+A formula such as ``TeamWealth * 1.2``, ``×1.2``, ``+10%`` or
+``SupporterCount + TeamWealth / 100`` is parsed with ``ast`` into a small
+whitelisted expression tree (numbers, team fields, + - * / and
+parentheses). The tree compiles both to a parameterised SQL expression,
+so a whole selection is updated with one UPDATE, and to a Python
+function used for the preview. Qt-free.
+"""
+
+import ast
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cfs_database import TeamRecord, TEAM_FIELD_ATTRS, TEAM_NUMERIC_FIELDS
+from team_search import QUERY_FIELD_ALIASES
+
+# 可以批量修改的字段
+BULK_EDIT_FIELDS = list(TEAM_NUMERIC_FIELDS)
+
+_PERCENT_FUNC = "__percent__"
+_PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+_LEADING_OP_RE = re.compile(r"^\s*[-+*/]")
+
+_BIN_OPS = {
+    ast.Add: ("+", lambda a, b: a + b),
+    ast.Sub: ("-", lambda a, b: a - b),
+    ast.Mult: ("*", lambda a, b: a * b),
+    ast.Div: ("/", lambda a, b: a / b),
+}
+
+
+class FormulaError(ValueError):
+    """Raised when a bulk-edit formula is invalid."""
+
+
+def _round_half_away(value: float) -> int:
+    """Round like SQLite's ROUND(): halves away from zero."""
+    return int(math.copysign(math.floor(abs(value) + 0.5), value))
+
+
+class Formula:
+    """A compiled formula for one numeric team field."""
+
+    def __init__(self, field: str, text: str):
+        if field not in BULK_EDIT_FIELDS:
+            raise FormulaError(f"不支持批量修改的字段: {field}")
+        self.field = field
+        self.text = text.strip()
+        self._tree = self._parse(self.text)
+        self.sql, self.params = self._to_sql(self._tree)
+
+    def _parse(self, text: str) -> ast.AST:
+        """Parse the formula text into a Python expression tree."""
+        if not text:
+            raise FormulaError(f"{self.field} 的公式为空")
+        text = text.replace("×", "*").replace("÷", "/")
+        # 以运算符开头时作用于字段本身，如 "*1.2" 或 "+10%"
+        if _LEADING_OP_RE.match(text):
+            text = f"{self.field} {text}"
+        text = _PERCENT_RE.sub(lambda m: f"{_PERCENT_FUNC}({m.group(1)})", text)
+        try:
+            tree = ast.parse(text, mode="eval").body
+        except SyntaxError:
+            raise FormulaError(f"{self.field} 的公式无法解析: {self.text}")
+        self._check(tree)
+        return tree
+
+    def _check(self, node: ast.AST):
+        """Reject everything except numbers, fields and arithmetic."""
+        if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+            self._check(node.left)
+            self._check(node.right)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+            self._check(node.operand)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+                and not isinstance(node.value, bool):
+            pass
+        elif isinstance(node, ast.Name):
+            self._field_of(node)
+        elif self._percent_value(node) is not None:
+            pass
+        else:
+            raise FormulaError(f"{self.field} 的公式只能包含数字、字段名和 + - × ÷: {self.text}")
+
+    @staticmethod
+    def _percent_value(node: ast.AST) -> Optional[float]:
+        """Return N of an ``N%`` term, or None."""
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id == _PERCENT_FUNC and len(node.args) == 1 and not node.keywords
+                and isinstance(node.args[0], ast.Constant)):
+            return float(node.args[0].value)
+        return None
+
+    def _field_of(self, node: ast.Name) -> str:
+        """Resolve a field name or alias used in the formula."""
+        field = QUERY_FIELD_ALIASES.get(node.id.lower())
+        if field not in TEAM_NUMERIC_FIELDS:
+            raise FormulaError(f"公式中只能使用数值字段: {node.id}")
+        return field
+
+    def _percent_operand(self, node: ast.BinOp) -> Optional[float]:
+        """For ``x + N%`` / ``x - N%`` return the multiplier of x, else None."""
+        if isinstance(node.op, (ast.Add, ast.Sub)):
+            percent = self._percent_value(node.right)
+            if percent is not None:
+                sign = 1 if isinstance(node.op, ast.Add) else -1
+                return 1 + sign * percent / 100
+        return None
+
+    def _to_sql(self, node: ast.AST) -> Tuple[str, List[Any]]:
+        """Compile a checked tree to an SQL expression over ``Teams`` columns."""
+        if isinstance(node, ast.BinOp):
+            left, left_params = self._to_sql(node.left)
+            multiplier = self._percent_operand(node)
+            if multiplier is not None:
+                return f"({left} * ?)", left_params + [multiplier]
+            right, right_params = self._to_sql(node.right)
+            op = _BIN_OPS[type(node.op)][0]
+            if op == "/":
+                # 避免整数除法截断
+                return f"({left} * 1.0 / {right})", left_params + right_params
+            return f"({left} {op} {right})", left_params + right_params
+        if isinstance(node, ast.UnaryOp):
+            operand, params = self._to_sql(node.operand)
+            return (f"(-{operand})" if isinstance(node.op, ast.USub) else operand), params
+        if isinstance(node, ast.Name):
+            return self._field_of(node), []
+        percent = self._percent_value(node)
+        if percent is not None:
+            return "?", [percent / 100]
+        return "?", [node.value]
+
+    def _evaluate(self, node: ast.AST, values: Dict[str, Any]) -> float:
+        """Evaluate a checked tree for one team (used by the preview)."""
+        if isinstance(node, ast.BinOp):
+            left = self._evaluate(node.left, values)
+            multiplier = self._percent_operand(node)
+            if multiplier is not None:
+                return left * multiplier
+            return _BIN_OPS[type(node.op)][1](left, self._evaluate(node.right, values))
+        if isinstance(node, ast.UnaryOp):
+            operand = self._evaluate(node.operand, values)
+            return -operand if isinstance(node.op, ast.USub) else operand
+        if isinstance(node, ast.Name):
+            value = values[self._field_of(node)]
+            if value is None:
+                raise TypeError("NULL")
+            return float(value)
+        percent = self._percent_value(node)
+        if percent is not None:
+            return percent / 100
+        return node.value
+
+    def assignment_sql(self) -> Tuple[str, List[Any]]:
+        """Return ``field = expr`` for the UPDATE; NULL results keep the old value."""
+        return (
+            f"{self.field} = COALESCE(CAST(ROUND({self.sql}) AS INTEGER), {self.field})",
+            list(self.params)
+        )
+
+    def evaluate(self, values: Dict[str, Any]) -> Any:
+        """Return the new value of the field for a team, as the UPDATE would."""
+        try:
+            return _round_half_away(self._evaluate(self._tree, values))
+        except (ZeroDivisionError, TypeError, ValueError, OverflowError):
+            return values[self.field]
+
+
+class BulkTeamEdit:
+    """Formulas for several fields applied to a set of teams."""
+
+    def __init__(self, formulas: Dict[str, str]):
+        self.formulas = [
+            Formula(field, text) for field, text in formulas.items() if text and text.strip()
+        ]
+        if not self.formulas:
+            raise FormulaError("请至少填写一个字段的公式")
+
+    @property
+    def fields(self) -> List[str]:
+        return [formula.field for formula in self.formulas]
+
+    def assignments_sql(self) -> Tuple[str, List[Any]]:
+        """Return the SET clause and its parameters."""
+        clauses = []
+        params: List[Any] = []
+        for formula in self.formulas:
+            clause, clause_params = formula.assignment_sql()
+            clauses.append(clause)
+            params.extend(clause_params)
+        return ", ".join(clauses), params
+
+    def preview(self, records: Sequence[TeamRecord]) -> List[Tuple[TeamRecord, Dict[str, Any], Dict[str, Any]]]:
+        """Return (record, old values, new values) of the teams that would change.
+
+        All formulas see the values before the edit, as in a single UPDATE.
+        """
+        result = []
+        for record in records:
+            old = {field: getattr(record, TEAM_FIELD_ATTRS[field]) for field in TEAM_NUMERIC_FIELDS}
+            new = {formula.field: formula.evaluate(old) for formula in self.formulas}
+            if any(old[field] != value for field, value in new.items()):
+                result.append((record, old, new))
+        return result
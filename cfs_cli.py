@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Headless command-line interface for batch operations on save files.
+
+Run as ``python main.py cli <command> ...`` or ``python cfs_cli.py
+<command> ...``. Neither PySide6 nor qt_material is imported, so the
+commands start quickly from shell scripts and cron jobs. Listings are
+written to stdout as JSON or CSV, summaries as JSON; logs and errors go
+to stderr.
+
+Exit codes: 0 success, 1 error, 2 invalid arguments, 3 patch conflicts.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+from cfs_database import CfsDatabase, StaffRecord, TEAM_EDITABLE_FIELDS, TEAM_NUMERIC_FIELDS
+from cfs_export import EXPORT_FORMATS, EXPORT_SOURCES, export_table, write_table
+from cfs_patch import write_patch
+from team_search import QUERY_FIELD_ALIASES, parse_team_query
+
+logger = logging.getLogger("TeamEditor.cli")
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_CONFLICTS = 3
+
+OUTPUT_FORMATS = ("json", "csv")
+
+STAFF_FIELD_ALIASES = {"name": "Name", "ability": "rawAbility", "rawability": "rawAbility", "fame": "Fame"}
+
+STAFF_COLUMNS = ["ID", "Name", "Ability", "Fame", "EmployedTeamID"]
+
+
+class CliError(Exception):
+    """An error reported to the user with exit code 1."""
+
+
+def _staff_dict(staff: StaffRecord) -> Dict[str, Any]:
+    return dict(zip(STAFF_COLUMNS, (staff.id, staff.name, staff.ability, staff.fame, staff.team_id)))
+
+
+def _write_records(records: Sequence[Dict[str, Any]], fmt: str, columns: Optional[List[str]] = None):
+    """Print records as a JSON array or as CSV with a header row."""
+    if fmt == "json":
+        json.dump(list(records), sys.stdout, ensure_ascii=False, indent=1)
+        sys.stdout.write("\n")
+        return
+    columns = columns or (list(records[0]) if records else [])
+    writer = csv.writer(sys.stdout)
+    writer.writerow(columns)
+    writer.writerows([record.get(column) for column in columns] for record in records)
+
+
+def _write_summary(summary: Dict[str, Any]):
+    json.dump(summary, sys.stdout, ensure_ascii=False)
+    sys.stdout.write("\n")
+
+
+def _open_database(path: str) -> CfsDatabase:
+    """Open an existing save file (sqlite3 would silently create a new one)."""
+    if not os.path.isfile(path):
+        raise CliError(f"数据库文件不存在: {path}")
+    return CfsDatabase(path)
+
+
+def _existing_ids(db: CfsDatabase, table: str, ids: List[int]) -> set:
+    rows = db.conn.execute(
+        f"SELECT ID FROM {table} WHERE ID IN (SELECT value FROM json_each(?))", (json.dumps(ids),)
+    )
+    return {row[0] for row in rows}
+
+
+def cmd_list_teams(db: CfsDatabase, args) -> int:
+    if args.league is None:
+        teams = db.load_teams()
+    else:
+        teams = db.load_teams("T.BelongingLeague = ?", (args.league,))
+    _write_records([team.to_dict() for team in teams], args.format)
+    return EXIT_OK
+
+
+def cmd_search(db: CfsDatabase, args) -> int:
+    if args.staff:
+        records = [_staff_dict(staff) for staff in db.search_staff(args.query, build_index=args.build_index)]
+        _write_records(records, args.format, STAFF_COLUMNS)
+        return EXIT_OK
+
+    # 与界面中的搜索框相同的查询语法，如 "league:3 wealth>5000 城"；
+    # 自由文本通过搜索索引匹配球队名称、昵称、地区和主场名称
+    query = parse_team_query(args.query)
+    where, params = query.to_sql(terms=False)
+    if query.terms:
+        teams = db.search_teams(query.terms, where, params, build_index=args.build_index)
+    else:
+        teams = db.load_teams(where, params) if where else db.load_teams()
+    _write_records([team.to_dict() for team in teams], args.format)
+    return EXIT_OK
+
+
+def cmd_export(db: CfsDatabase, args) -> int:
+    if args.output in (None, "-"):
+        rows = write_table(db.conn, args.source, sys.stdout, args.export_format or "csv")
+    else:
+        rows = export_table(db.conn, args.source, args.output, fmt=args.export_format)
+    logger.info(f"已导出 {rows} 行")
+    return EXIT_OK
+
+
+def cmd_set_field(db: CfsDatabase, args) -> int:
+    ids = list(dict.fromkeys(args.ids))
+    if args.table == "teams":
+        field = QUERY_FIELD_ALIASES.get(args.field.lower())
+        if field not in TEAM_EDITABLE_FIELDS:
+            raise CliError(f"球队没有可修改的字段 {args.field}")
+        numeric = field in TEAM_NUMERIC_FIELDS
+        table = "Teams"
+    else:
+        field = STAFF_FIELD_ALIASES.get(args.field.lower())
+        if field is None:
+            raise CliError(f"员工没有可修改的字段 {args.field}")
+        numeric = field != "Name"
+        table = "Staff"
+
+    value: Any = args.value
+    if numeric:
+        try:
+            value = int(args.value)
+        except ValueError:
+            raise CliError(f"{field} 的值必须为整数: {args.value}") from None
+
+    missing = sorted(set(ids) - _existing_ids(db, table, ids))
+    if missing:
+        raise CliError(f"{table} 中不存在ID: {', '.join(map(str, missing))}")
+
+    if table == "Teams":
+        changes = db.bulk_update_teams(ids, [field], f"{field} = ?", [value])
+    else:
+        changes = db.set_staff_column(field, ids, value)
+
+    if args.patch:
+        write_patch(changes, args.patch, source=os.path.basename(db.path))
+    _write_summary({"table": table, "field": field, "matched": len(ids), "changed": len(changes)})
+    return EXIT_OK
+
+
+def cmd_staff_top(db: CfsDatabase, args) -> int:
+    where = " WHERE EmployedTeamID = ?" if args.team is not None else ""
+    order = "RawAbility" if args.by == "ability" else "Fame"
+    params = ([args.team] if args.team is not None else []) + [args.limit]
+    rows = db.conn.execute(
+        f"{CfsDatabase.STAFF_SELECT}{where} ORDER BY {order} DESC, ID LIMIT ?", params
+    ).fetchall()
+    _write_records([_staff_dict(StaffRecord(row)) for row in rows], args.format, STAFF_COLUMNS)
+    return EXIT_OK
+
+
+def cmd_apply_patch(db: CfsDatabase, args) -> int:
+    result = db.apply_patch(args.patch, force=args.force)
+    _write_summary({
+        "applied": len(result.applied),
+        "skipped": len(result.skipped),
+        "conflicts": [str(conflict) for conflict in result.conflicts],
+    })
+    return EXIT_CONFLICTS if result.conflicts else EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cfs-cli", description="CFS球队编辑器命令行工具")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    database = argparse.ArgumentParser(add_help=False)
+    database.add_argument("database", help="存档数据库文件 (.db)")
+    database.add_argument("-v", "--verbose", action="store_true", help="在stderr输出运行日志")
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--format", choices=OUTPUT_FORMATS, default="json", help="输出格式 (默认 json)")
+
+    command = commands.add_parser("list-teams", parents=[database, output], help="列出球队")
+    command.add_argument("--league", type=int, help="只列出该联赛ID的球队")
+    command.set_defaults(handler=cmd_list_teams)
+
+    command = commands.add_parser("search", parents=[database, output], help="搜索球队或员工")
+    command.add_argument("query", help='搜索内容，球队支持 "league:3 wealth>5000" 等条件')
+    command.add_argument("--staff", action="store_true", help="按姓名搜索员工")
+    command.add_argument(
+        "--build-index", action="store_true",
+        help="在存档旁创建或更新全文搜索索引 (<存档>.search.sqlite) 后再搜索；默认只使用已有的索引"
+    )
+    command.set_defaults(handler=cmd_search)
+
+    command = commands.add_parser("export", parents=[database], help="导出数据表")
+    command.add_argument("source", choices=list(EXPORT_SOURCES), help="导出的数据")
+    command.add_argument("output", nargs="?", help="输出文件，格式由扩展名决定；省略或为 - 时写到stdout")
+    command.add_argument("--format", dest="export_format", choices=EXPORT_FORMATS, help="覆盖输出格式")
+    command.set_defaults(handler=cmd_export)
+
+    command = commands.add_parser("set-field", parents=[database], help="把一组球队或员工的字段设为同一个值")
+    command.add_argument("table", choices=["teams", "staff"])
+    command.add_argument("field", help="字段名，如 wealth、supporters、ability、fame")
+    command.add_argument("value")
+    command.add_argument("ids", type=int, nargs="+", metavar="ID")
+    command.add_argument("--patch", help="同时把修改写入补丁文件")
+    command.set_defaults(handler=cmd_set_field)
+
+    command = commands.add_parser("staff-top", parents=[database, output], help="列出能力值或知名度最高的员工")
+    command.add_argument("-n", "--limit", type=int, default=20)
+    command.add_argument("--by", choices=["ability", "fame"], default="ability")
+    command.add_argument("--team", type=int, help="只统计该球队ID的员工")
+    command.set_defaults(handler=cmd_staff_top)
+
+    command = commands.add_parser("apply-patch", parents=[database], help="应用修改补丁")
+    command.add_argument("patch", help="补丁文件")
+    command.add_argument("--force", action="store_true", help="忽略旧值检查直接写入")
+    command.set_defaults(handler=cmd_apply_patch)
+
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run one command and return the process exit code."""
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_USAGE if e.code else EXIT_OK
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+
+    try:
+        with _open_database(args.database) as db:
+            return args.handler(db, args)
+    except BrokenPipeError:
+        # 输出被 head 等命令截断
+        return EXIT_OK
+    except (CliError, sqlite3.Error, OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,727 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CFS database access layer.
+
+Owns the SQLite connection, the queries and the construction of
+TeamRecord / StaffRecord objects. This module must not import PySide6 so
+that batch scripts can read and edit save files without starting Qt.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from cfs_patch import PatchResult, RowChange, apply_changes, diff_row, read_patch, write_patch
+from fts_index import FtsSidecar, sidecar_path
+
+logger = logging.getLogger("TeamEditor.database")
+
+# Teams表字段（按查询顺序）
+TEAM_FIELDS = [
+    "ID", "TeamName", "TeamWealth", "TeamFoundYear",
+    "TeamLocation", "SupporterCount", "StadiumName", "Nickname", "BelongingLeague"
+]
+
+# 球队详情中可编辑的字段
+TEAM_EDITABLE_FIELDS = [f for f in TEAM_FIELDS if f not in ("ID", "BelongingLeague")]
+
+TEAM_NUMERIC_FIELDS = ["TeamWealth", "SupporterCount", "TeamFoundYear"]
+
+# Teams字段对应的TeamRecord属性
+TEAM_FIELD_ATTRS = {
+    "ID": "id",
+    "TeamName": "name",
+    "TeamWealth": "wealth",
+    "TeamFoundYear": "found_year",
+    "TeamLocation": "location",
+    "SupporterCount": "supporter_count",
+    "StadiumName": "stadium_name",
+    "Nickname": "nickname",
+    "BelongingLeague": "league_id",
+}
+
+# 分块读取时每次 fetchmany 的行数
+LOAD_CHUNK_SIZE = 2000
+
+# 在线备份每一步复制的页数
+BACKUP_PAGES = 256
+
+def raw_ability_sql(alias: str = "") -> str:
+    """员工能力值是 AbilityJSON 中的 rawAbility 键；非法JSON读取为NULL。
+
+    alias 为 Staff 表的别名（如 "S"），用于多表查询。
+    """
+    column = f"{alias}.AbilityJSON" if alias else "AbilityJSON"
+    return f"CASE WHEN json_valid({column}) THEN json_extract({column}, '$.rawAbility') END"
+
+
+RAW_ABILITY_SQL = raw_ability_sql()
+
+# 在SQLite中只替换 rawAbility 并保留游戏存储的其他键；
+# AbilityJSON 不是JSON对象时写入只含 rawAbility 的新对象
+ABILITY_JSON_SET_SQL = (
+    "json_set(COALESCE(CASE WHEN json_valid(AbilityJSON) "
+    "THEN CASE json_type(AbilityJSON) WHEN 'object' THEN AbilityJSON END END, '{}'), "
+    "'$.rawAbility', ?)"
+)
+
+# 批量修改员工时每次 executemany 的行数
+STAFF_UPDATE_CHUNK_SIZE = 20000
+
+# 搜索字符串中的字段分隔符（搜索框输入中不会出现换行）
+SEARCH_FIELD_SEPARATOR = "\n"
+
+
+def _remove_database_file(path: str):
+    """删除已存在的数据库文件及其WAL/SHM文件（导出前覆盖目标）。"""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+class TeamRecord:
+    """Team record data class."""
+
+    def __init__(self, record_data: tuple):
+        """Initialize team data from database record."""
+        self.reload(record_data)
+
+    def reload(self, record_data: tuple):
+        """Overwrite the fields in place from a database record."""
+        self.id = record_data[0]
+        self.name = record_data[1]
+        self.wealth = record_data[2]
+        self.found_year = record_data[3]
+        self.location = record_data[4]
+        self.supporter_count = record_data[5]
+        self.stadium_name = record_data[6]
+        self.nickname = record_data[7]
+        self.league_id = record_data[8]
+
+    def __str__(self) -> str:
+        """Return string representation of the team."""
+        return f"{self.name} (ID: {self.id})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert team record to dictionary."""
+        return {
+            "ID": self.id,
+            "TeamName": self.name,
+            "TeamWealth": self.wealth,
+            "TeamFoundYear": self.found_year,
+            "TeamLocation": self.location,
+            "SupporterCount": self.supporter_count,
+            "StadiumName": self.stadium_name,
+            "Nickname": self.nickname,
+            "BelongingLeague": self.league_id
+        }
+
+    def as_search_string(self) -> str:
+        """Return string used for searching.
+
+        Fields are separated so that a search term cannot match across the
+        boundary between two fields.
+        """
+        return SEARCH_FIELD_SEPARATOR.join(
+            str(value) for value in (
+                self.id, self.name, self.wealth, self.found_year, self.location,
+                self.supporter_count, self.stadium_name, self.nickname, self.league_id
+            )
+        )
+
+
+def parse_ability(ability_json, staff_id=None) -> int:
+    """Parse rawAbility from an AbilityJSON value, returning 0 if it is invalid."""
+    try:
+        return int(json.loads(ability_json).get('rawAbility', 0))
+    except (json.JSONDecodeError, TypeError, AttributeError, ValueError) as e:
+        logger.error(f"Failed to parse ability JSON of staff {staff_id}: {e}")
+        return 0
+
+
+class StaffRecord:
+    """Staff record data class."""
+
+    __slots__ = ("id", "name", "ability_json", "fame", "team_id", "ability")
+
+    def __init__(self, record_data: tuple):
+        """Initialize staff data from database record."""
+        self.reload(record_data)
+
+    def reload(self, record_data: tuple):
+        """Overwrite the fields in place from a database record.
+
+        The optional sixth column is rawAbility already extracted by SQLite;
+        when it is missing or NULL the JSON is parsed here, once per row.
+        """
+        self.id = record_data[0]
+        self.name = record_data[1]
+        self.ability_json = record_data[2]
+        self.fame = record_data[3]
+        self.team_id = record_data[4]
+
+        raw_ability = record_data[5] if len(record_data) > 5 else None
+        if isinstance(raw_ability, (int, float)):
+            self.ability = int(raw_ability)
+        else:
+            self.ability = parse_ability(self.ability_json, self.id)
+
+    def get_ability(self) -> int:
+        """Return the ability value parsed at load time."""
+        return self.ability
+
+
+class CommitResult:
+    """Outcome of CfsDatabase.commit_edits."""
+
+    def __init__(self):
+        self.changes: List[RowChange] = []
+        self.committed: Dict[str, List[int]] = {}  # 表名 -> 已提交的行ID
+        self.failures: Dict[str, str] = {}  # 表名 -> 错误信息（该表已回滚）
+
+    def raise_for_failures(self):
+        """有表提交失败时抛出 sqlite3.Error。"""
+        if self.failures:
+            raise sqlite3.Error("; ".join(f"{table}: {error}" for table, error in self.failures.items()))
+
+
+class EditSession:
+    """Edits staged in memory and committed together in one transaction."""
+
+    def __init__(self, db: "CfsDatabase"):
+        self.db = db
+        self.edits: Dict[str, Dict[int, Dict[str, Any]]] = {"Teams": {}, "Staff": {}}
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self.edits.values())
+
+    def stage_team(self, team_id: int, data: Dict[str, Any]):
+        """暂存球队可编辑字段的新值。"""
+        self.edits["Teams"].setdefault(team_id, {}).update(
+            {field: data[field] for field in TEAM_EDITABLE_FIELDS if field in data}
+        )
+
+    def stage_staff(self, staff: StaffRecord, name: str, ability: int, fame: int):
+        """暂存员工姓名、能力值和知名度的新值。"""
+        self.edits["Staff"].setdefault(staff.id, {}).update(
+            {"Name": name, "rawAbility": int(ability), "Fame": fame}
+        )
+
+    def staged(self, table: str, row_id: int) -> Optional[Dict[str, Any]]:
+        """返回某行暂存的新值，没有暂存修改时返回None。"""
+        return self.edits[table].get(row_id)
+
+    def discard(self, table: Optional[str] = None, row_id: Optional[int] = None):
+        """放弃暂存的修改：全部、某个表或某一行。"""
+        for name, rows in self.edits.items():
+            if table is not None and name != table:
+                continue
+            if row_id is None:
+                rows.clear()
+            else:
+                rows.pop(row_id, None)
+
+    def commit(self) -> CommitResult:
+        """在一个事务中提交全部暂存修改；失败的表保留暂存状态。"""
+        result = self.db.commit_edits(self.edits)
+        for table, row_ids in result.committed.items():
+            for row_id in row_ids:
+                self.edits[table].pop(row_id, None)
+        return result
+
+
+class CfsDatabase:
+    """CFS存档数据库访问对象，不依赖Qt。"""
+
+    LEAGUE_QUERY = "SELECT ID, LeagueName FROM League"
+
+    TEAM_SELECT = """
+        SELECT T.ID, T.TeamName, T.TeamWealth, T.TeamFoundYear,
+               T.TeamLocation, T.SupporterCount, T.StadiumName,
+               T.Nickname, T.BelongingLeague
+        FROM Teams T
+    """
+
+    TEAM_QUERY = TEAM_SELECT + " ORDER BY T.TeamName"
+
+    # rawAbility 在SQLite中解析，非法JSON返回NULL并交由Python记录日志
+    STAFF_SELECT = f"""
+        SELECT ID, Name, AbilityJSON, Fame, EmployedTeamID, {RAW_ABILITY_SQL} AS RawAbility
+        FROM Staff
+    """
+
+    STAFF_QUERY = STAFF_SELECT + " ORDER BY Name"
+
+    # rawAbility 不是数据库列，读写时使用 COLUMN_SQL 中的表达式
+    STAFF_EDITABLE_FIELDS = ["Name", "rawAbility", "Fame"]
+
+    # 虚拟列：表名 -> {列名: (读取表达式, 赋值表达式)}
+    COLUMN_SQL = {
+        "Staff": {"rawAbility": (RAW_ABILITY_SQL, f"AbilityJSON = {ABILITY_JSON_SET_SQL}")},
+    }
+
+    # 批量修改员工数值字段：字段 -> 列名
+    STAFF_VALUE_COLUMNS = {"ability": "rawAbility", "fame": "Fame"}
+
+    # 补丁可以修改的列（AbilityJSON 用于应用整体替换能力值JSON的旧补丁）
+    PATCH_COLUMNS = {
+        "Teams": TEAM_EDITABLE_FIELDS,
+        "Staff": STAFF_EDITABLE_FIELDS + ["AbilityJSON"],
+    }
+
+    # 全文搜索覆盖的球队文本字段
+    TEAM_TEXT_COLUMNS = ["TeamName", "Nickname", "TeamLocation", "StadiumName"]
+
+    def __init__(self, path: str):
+        """打开数据库文件。"""
+        self.path = os.path.abspath(path)
+        self.conn = None
+        self.cursor = None
+        self.search_sidecar: Optional[FtsSidecar] = None
+        # 本次会话中通过 update_team / update_staff 提交的修改
+        self.changes: List[RowChange] = []
+        self._connect()
+
+        # 已存在的搜索索引随数据库一起打开，以便编辑时保持同步
+        if os.path.exists(sidecar_path(self.path)):
+            self._open_search_sidecar()
+
+    def _connect(self):
+        """建立连接。"""
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row  # 使用命名列访问
+        self.cursor = self.conn.cursor()
+
+    def close(self):
+        """关闭连接。"""
+        if self.search_sidecar:
+            self.search_sidecar.close()
+            self.search_sidecar = None
+        if self.conn:
+            self.conn.close()
+        self.conn = None
+        self.cursor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def directory(self) -> str:
+        """数据库所在目录（Logo文件也在此目录）。"""
+        return os.path.dirname(self.path)
+
+    def load_leagues(self) -> Dict[int, str]:
+        """加载联赛ID到名称的映射。"""
+        self.cursor.execute(self.LEAGUE_QUERY)
+        return {row['ID']: row['LeagueName'] for row in self.cursor.fetchall()}
+
+    def load_teams(self, where: str = "", params=()) -> List[TeamRecord]:
+        """加载球队，where 为可选的参数化条件（列名使用别名 T）。"""
+        if where:
+            self.cursor.execute(f"{self.TEAM_SELECT} WHERE {where} ORDER BY T.TeamName", params)
+        else:
+            self.cursor.execute(self.TEAM_QUERY)
+        return [TeamRecord(row) for row in self.cursor.fetchall()]
+
+    def count_rows(self, table: str) -> int:
+        """返回表的行数（用于显示加载进度）。"""
+        if table not in ("League", "Teams", "Staff"):
+            raise ValueError(f"未知的表: {table}")
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def _iter_records(self, query: str, record_class, chunk_size: int) -> Iterator[list]:
+        """用独立游标按块读取记录。"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [record_class(row) for row in rows]
+        finally:
+            cursor.close()
+
+    def iter_teams(self, chunk_size: int = LOAD_CHUNK_SIZE) -> Iterator[List[TeamRecord]]:
+        """按块读取全部球队（顺序与 load_teams 相同）。"""
+        return self._iter_records(self.TEAM_QUERY, TeamRecord, chunk_size)
+
+    def iter_staff(self, chunk_size: int = LOAD_CHUNK_SIZE) -> Iterator[List[StaffRecord]]:
+        """按块读取全部员工（按姓名排序）。"""
+        return self._iter_records(self.STAFF_QUERY, StaffRecord, chunk_size)
+
+    def _reload_records(self, select: str, id_column: str, records: Iterable) -> list:
+        """用一次查询重新读取多条记录并就地更新，返回仍存在的记录。"""
+        by_id = {record.id: record for record in records}
+        if not by_id:
+            return []
+        rows = self.conn.execute(
+            f"{select} WHERE {id_column} IN (SELECT value FROM json_each(?))", (json.dumps(list(by_id)),)
+        )
+        reloaded = []
+        for row in rows:
+            record = by_id[row[0]]
+            record.reload(row)
+            reloaded.append(record)
+        return reloaded
+
+    def reload_teams(self, records: Iterable[TeamRecord]) -> List[TeamRecord]:
+        """用一次查询重新读取多个球队，返回仍存在的球队。"""
+        return self._reload_records(self.TEAM_SELECT, "T.ID", records)
+
+    def reload_staff_records(self, records: Iterable[StaffRecord]) -> List[StaffRecord]:
+        """用一次查询重新读取多个员工，返回仍存在的员工。"""
+        return self._reload_records(self.STAFF_SELECT, "ID", records)
+
+    def _select_sql(self, table: str, column: str) -> str:
+        """返回读取一列的SQL表达式。"""
+        return self.COLUMN_SQL.get(table, {}).get(column, (column,))[0]
+
+    def _assign_sql(self, table: str, column: str) -> str:
+        """返回写入一列的参数化赋值表达式。"""
+        expressions = self.COLUMN_SQL.get(table, {})
+        return expressions[column][1] if column in expressions else f"{column} = ?"
+
+    def _rows_values(self, table: str, row_ids: List[int], columns: List[str]) -> Dict[int, Dict[str, Any]]:
+        """一次读取多行的指定列（用于记录修改前的值）。"""
+        rows = self.conn.execute(
+            f"SELECT ID, {', '.join(self._select_sql(table, column) for column in columns)} FROM {table} "
+            f"WHERE ID IN (SELECT value FROM json_each(?))",
+            (json.dumps(row_ids),)
+        )
+        return {row[0]: dict(zip(columns, tuple(row)[1:])) for row in rows}
+
+    def commit_edits(self, edits: Dict[str, Dict[int, Dict[str, Any]]]) -> CommitResult:
+        """在一个事务中提交多行修改。
+
+        edits 为 {表名: {行ID: {列名: 新值}}}，只允许 PATCH_COLUMNS 中的列。
+        每个表的 UPDATE 按列组合用 executemany 执行，并放在各自的保存点中：
+        某个表失败时只回滚该表的修改，其余表照常提交。
+        """
+        for table, rows in edits.items():
+            allowed = self.PATCH_COLUMNS.get(table)
+            if allowed is None:
+                raise ValueError(f"不允许修改的表: {table}")
+            for values in rows.values():
+                unknown = set(values) - set(allowed)
+                if unknown:
+                    raise ValueError(f"不允许修改的列: {table}.{', '.join(sorted(unknown))}")
+
+        result = CommitResult()
+        sidecar_current = self._sidecar_is_current()
+        cursor = self.conn.cursor()
+        self.conn.execute("BEGIN")
+        try:
+            for table, rows in edits.items():
+                if not rows:
+                    continue
+                columns = self.PATCH_COLUMNS[table]
+                savepoint = f"edit_{table}"
+                cursor.execute(f"SAVEPOINT {savepoint}")
+                try:
+                    old_rows = self._rows_values(table, list(rows), columns)
+
+                    # 修改相同列的行合并为一次 executemany
+                    groups: Dict[tuple, list] = {}
+                    for row_id, values in rows.items():
+                        names = tuple(column for column in columns if column in values)
+                        groups.setdefault(names, []).append([values[name] for name in names] + [row_id])
+                    for names, params in groups.items():
+                        if names:
+                            cursor.executemany(
+                                f"UPDATE {table} SET {', '.join(self._assign_sql(table, name) for name in names)} "
+                                f"WHERE ID = ?",
+                                params
+                            )
+                    cursor.execute(f"RELEASE {savepoint}")
+                except sqlite3.Error as e:
+                    cursor.execute(f"ROLLBACK TO {savepoint}")
+                    cursor.execute(f"RELEASE {savepoint}")
+                    logger.error(f"提交 {table} 的修改失败，已回滚该表: {e}")
+                    result.failures[table] = str(e)
+                    continue
+
+                result.committed[table] = list(rows)
+                for row_id, values in rows.items():
+                    change = diff_row(table, row_id, old_rows.get(row_id, {}), values)
+                    if change:
+                        result.changes.append(change)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+        self.changes.extend(result.changes)
+        if sidecar_current and result.changes:
+            self._sync_sidecar(lambda sidecar: self._update_sidecar_rows(sidecar, result.changes))
+        return result
+
+    def _update_sidecar_rows(self, sidecar: FtsSidecar, changes: List[RowChange]):
+        """把已提交修改的行的文本字段写入搜索索引。"""
+        for change in changes:
+            if change.table == "Teams" and set(change.new) & set(self.TEAM_TEXT_COLUMNS):
+                sidecar.update_team(
+                    change.row_id,
+                    self._rows_values("Teams", [change.row_id], self.TEAM_TEXT_COLUMNS).get(change.row_id, {})
+                )
+            elif change.table == "Staff" and "Name" in change.new:
+                sidecar.update_staff(change.row_id, change.new["Name"])
+
+    def update_team(self, team_id: int, data: Dict[str, Any]):
+        """更新球队的可编辑字段并提交。"""
+        result = self.commit_edits({"Teams": {team_id: {field: data[field] for field in TEAM_EDITABLE_FIELDS}}})
+        result.raise_for_failures()
+
+    def update_staff(self, staff: StaffRecord, name: str, ability: int, fame: int):
+        """更新员工姓名、能力值和知名度并提交。"""
+        result = self.commit_edits({"Staff": {staff.id: {
+            "Name": name, "rawAbility": int(ability), "Fame": fame
+        }}})
+        result.raise_for_failures()
+
+    def bulk_update_teams(self, team_ids: List[int], columns: List[str], assignments: str,
+                          params=()) -> List[RowChange]:
+        """在一个事务中对一组球队执行一条 UPDATE 并返回记录的修改。
+
+        assignments 为参数化的 SET 子句，只能写 columns 中的列；
+        球队ID先写入临时表，UPDATE 通过子查询选中这些球队。
+        """
+        unknown = set(columns) - set(TEAM_EDITABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"不允许修改的字段: {', '.join(sorted(unknown))}")
+        sidecar_current = self._sidecar_is_current()
+        cursor = self.conn.cursor()
+        self.conn.execute("BEGIN")
+        try:
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_team_ids (id INTEGER PRIMARY KEY)")
+            cursor.execute("DELETE FROM bulk_team_ids")
+            cursor.executemany("INSERT OR IGNORE INTO bulk_team_ids (id) VALUES (?)", ((i,) for i in team_ids))
+
+            old_rows = self._rows_values("Teams", list(team_ids), columns)
+            cursor.execute(
+                f"UPDATE Teams SET {assignments} WHERE ID IN (SELECT id FROM bulk_team_ids)",
+                list(params)
+            )
+            new_rows = self._rows_values("Teams", list(team_ids), columns)
+            cursor.execute("DELETE FROM bulk_team_ids")
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+        changes = []
+        for team_id, new in new_rows.items():
+            change = diff_row("Teams", team_id, old_rows.get(team_id, {}), new)
+            if change:
+                changes.append(change)
+        self.changes.extend(changes)
+        if sidecar_current and changes:
+            self._sync_sidecar(lambda sidecar: self._update_sidecar_rows(sidecar, changes))
+        logger.info(f"批量修改了 {len(changes)} 个球队")
+        return changes
+
+    def update_staff_values(self, field: str, rows: Sequence[Tuple[int, int]],
+                            chunk_size: int = STAFF_UPDATE_CHUNK_SIZE,
+                            progress: Optional[Callable[[int, int], None]] = None) -> List[RowChange]:
+        """在一个事务中批量写入员工的能力值或知名度并返回记录的修改。
+
+        rows 为 (员工ID, 新值)，按 chunk_size 分块执行 executemany；
+        能力值通过 json_set 写入 AbilityJSON，保留其中的其他键。
+        progress(已写入行数, 总行数) 在每块之后调用。
+        """
+        if field not in self.STAFF_VALUE_COLUMNS:
+            raise ValueError(f"不允许修改的字段: {field}")
+        column = self.STAFF_VALUE_COLUMNS[field]
+        update = f"UPDATE Staff SET {self._assign_sql('Staff', column)} WHERE ID = ?"
+        sidecar_current = self._sidecar_is_current()
+        changes = []
+        cursor = self.conn.cursor()
+        self.conn.execute("BEGIN")
+        try:
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                ids = [row_id for row_id, _ in chunk]
+                old_rows = self._rows_values("Staff", ids, [column])
+                cursor.executemany(update, [(value, row_id) for row_id, value in chunk])
+                for row_id, value in chunk:
+                    if row_id in old_rows:
+                        change = diff_row("Staff", row_id, old_rows[row_id], {column: value})
+                        if change:
+                            changes.append(change)
+                if progress:
+                    progress(start + len(chunk), len(rows))
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+        self.changes.extend(changes)
+        if sidecar_current and changes:
+            # 能力值和知名度不在索引中，只需更新数据库指纹
+            self._sync_sidecar(lambda sidecar: None)
+        logger.info(f"批量修改了 {len(changes)} 个员工的{column}")
+        return changes
+
+    def set_staff_column(self, column: str, staff_ids: List[int], value: Any) -> List[RowChange]:
+        """用一条 UPDATE 把一组员工的某个可编辑字段设为同一个值，返回记录的修改。"""
+        if column not in self.STAFF_EDITABLE_FIELDS:
+            raise ValueError(f"不允许修改的字段: {column}")
+        ids_json = json.dumps(list(staff_ids))
+        sidecar_current = self._sidecar_is_current()
+        self.conn.execute("BEGIN")
+        try:
+            old_rows = self._rows_values("Staff", list(staff_ids), [column])
+            self.conn.execute(
+                f"UPDATE Staff SET {self._assign_sql('Staff', column)} "
+                f"WHERE ID IN (SELECT value FROM json_each(?))",
+                (value, ids_json)
+            )
+            new_rows = self._rows_values("Staff", list(staff_ids), [column])
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+        changes = []
+        for row_id, new in new_rows.items():
+            change = diff_row("Staff", row_id, old_rows.get(row_id, {}), new)
+            if change:
+                changes.append(change)
+        self.changes.extend(changes)
+        if sidecar_current and changes:
+            self._sync_sidecar(lambda sidecar: self._update_sidecar_rows(sidecar, changes))
+        return changes
+
+    def export_patch(self, file_path: str) -> int:
+        """把本次会话的修改导出为补丁文件，返回修改的行数。"""
+        return write_patch(self.changes, file_path, source=os.path.basename(self.path))
+
+    def apply_patch(self, file_path: str, force: bool = False) -> PatchResult:
+        """在一个事务中应用补丁文件，冲突的修改被跳过并报告。
+
+        force 为 True 时忽略旧值检查，直接写入新值。
+        """
+        changes = read_patch(file_path)
+        result = apply_changes(self.conn, changes, self.PATCH_COLUMNS, force=force,
+                               expressions=self.COLUMN_SQL)
+        # 应用的修改也计入本次会话，可以继续导出
+        self.changes.extend(result.applied)
+        return result
+
+    def _open_search_sidecar(self) -> Optional[FtsSidecar]:
+        """打开搜索索引文件，失败时只记录日志。"""
+        try:
+            self.search_sidecar = FtsSidecar(self.path)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"无法打开搜索索引: {e}")
+            self.search_sidecar = None
+        return self.search_sidecar
+
+    def _sidecar_is_current(self) -> bool:
+        """搜索索引是否与数据库一致（一致时编辑后同步更新索引）。"""
+        try:
+            return bool(self.search_sidecar and self.search_sidecar.is_current())
+        except sqlite3.Error:
+            return False
+
+    def _sync_sidecar(self, update):
+        """将一次已提交的编辑同步到搜索索引。"""
+        try:
+            update(self.search_sidecar)
+            self.search_sidecar.mark_synced()
+        except sqlite3.Error as e:
+            # 索引未能同步时保持过期状态，下次使用时会重建
+            logger.warning(f"同步搜索索引失败: {e}")
+
+    def search_index(self, create: bool = False) -> Optional[FtsSidecar]:
+        """返回最新的搜索索引，过期时重建；FTS5不可用时返回None。
+
+        索引文件不存在时只有 create 为 True 才会在存档旁创建，否则返回None。
+        """
+        if self.search_sidecar is None:
+            if not create or self._open_search_sidecar() is None:
+                return None
+        try:
+            if not self.search_sidecar.is_current():
+                self.search_sidecar.rebuild(self.conn)
+        except sqlite3.Error as e:
+            logger.warning(f"重建搜索索引失败: {e}")
+            return None
+        return self.search_sidecar
+
+    def search_teams(self, terms: Sequence[str], where: str = "", params=(),
+                     build_index: bool = False) -> List[TeamRecord]:
+        """搜索名称、昵称、地区或主场名称包含全部 terms 的球队。
+
+        where/params 为附加条件（同 load_teams）。没有搜索索引时使用 LIKE 查询；
+        build_index 为 True 时先创建索引。
+        """
+        clauses = [f"({where})"] if where else []
+        params = list(params)
+        sidecar = self.search_index(create=build_index)
+        if sidecar is None:
+            for term in terms:
+                clauses.append("(" + " OR ".join(f"T.{column} LIKE ?" for column in self.TEAM_TEXT_COLUMNS) + ")")
+                params.extend([f"%{term}%"] * len(self.TEAM_TEXT_COLUMNS))
+        else:
+            clauses.append("T.ID IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(sidecar.search_teams(terms)))
+        return self.load_teams(" AND ".join(clauses), params)
+
+    def search_staff(self, text: str, build_index: bool = False) -> List[StaffRecord]:
+        """按姓名搜索员工，索引的使用方式同 search_teams。"""
+        sidecar = self.search_index(create=build_index)
+        if sidecar is None:
+            self.cursor.execute(self.STAFF_SELECT + " WHERE Name LIKE ? ORDER BY Name", (f"%{text}%",))
+        else:
+            ids = sidecar.search_staff(text)
+            self.cursor.execute(
+                self.STAFF_SELECT + " WHERE ID IN (SELECT value FROM json_each(?)) ORDER BY Name",
+                (json.dumps(ids),)
+            )
+        return [StaffRecord(row) for row in self.cursor.fetchall()]
+
+    def _prepare_export_target(self, file_path: str):
+        """检查导出路径并删除将被覆盖的文件。"""
+        if os.path.abspath(file_path) == self.path:
+            raise ValueError("不能导出到当前打开的数据库文件")
+        _remove_database_file(file_path)
+
+    def export_backup(self, file_path: str,
+                      progress: Optional[Callable[[int, int], None]] = None,
+                      pages: int = BACKUP_PAGES):
+        """用SQLite在线备份把数据库复制到指定路径，每次复制 pages 页。
+
+        使用独立连接，可以在后台线程中调用，不影响当前连接上的编辑。
+        progress(已复制页数, 总页数) 在每一步后调用。
+        """
+        self._prepare_export_target(file_path)
+        source = sqlite3.connect(self.path)
+        target = sqlite3.connect(file_path)
+        try:
+            def on_progress(status, remaining, total):
+                if progress:
+                    progress(total - remaining, total)
+
+            source.backup(target, pages=pages, progress=on_progress)
+        finally:
+            target.close()
+            source.close()
+
+    def export_compact(self, file_path: str):
+        """用 VACUUM INTO 导出整理后的最小数据库文件。
+
+        使用独立连接，可以在后台线程中调用。
+        """
+        self._prepare_export_target(file_path)
+        source = sqlite3.connect(self.path)
+        try:
+            source.execute("VACUUM INTO ?", (file_path,))
+        finally:
+            source.close()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming table export for CFS save databases.
+
+Rows are read from a cursor with ``fetchmany`` and written straight to
+the output file, so memory use does not grow with the table size. CSV
+and TSV are written with the ``csv`` module, JSON Lines with one object
+per row; any format can be gzip-compressed. Qt-free.
+"""
+
+import csv
+import gzip
+import json
+import logging
+import sqlite3
+from typing import Callable, Dict, List, Optional, Sequence
+
+from cfs_database import raw_ability_sql
+
+logger = logging.getLogger("TeamEditor.export")
+
+EXPORT_CHUNK_SIZE = 5000
+
+EXPORT_FORMATS = ("csv", "tsv", "jsonl")
+
+# 员工能力值在SQLite中解析，非法JSON导出为空
+_RAW_ABILITY_SQL = raw_ability_sql("S")
+
+
+class ExportSource:
+    """A named query that can be exported."""
+
+    def __init__(self, title: str, columns: Sequence[str], query: str):
+        self.title = title
+        self.columns = list(columns)
+        self.query = query
+
+
+EXPORT_SOURCES: Dict[str, ExportSource] = {
+    "teams": ExportSource(
+        "球队",
+        ["ID", "TeamName", "TeamWealth", "TeamFoundYear", "TeamLocation",
+         "SupporterCount", "StadiumName", "Nickname", "BelongingLeague"],
+        """
+        SELECT T.ID, T.TeamName, T.TeamWealth, T.TeamFoundYear, T.TeamLocation,
+               T.SupporterCount, T.StadiumName, T.Nickname, T.BelongingLeague
+        FROM Teams T ORDER BY T.TeamName
+        """
+    ),
+    "staff": ExportSource(
+        "员工",
+        ["ID", "Name", "Ability", "Fame", "EmployedTeamID"],
+        f"""
+        SELECT S.ID, S.Name, {_RAW_ABILITY_SQL}, S.Fame, S.EmployedTeamID
+        FROM Staff S ORDER BY S.ID
+        """
+    ),
+    "leagues": ExportSource(
+        "联赛",
+        ["ID", "LeagueName"],
+        "SELECT L.ID, L.LeagueName FROM League L ORDER BY L.ID"
+    ),
+    "teams_leagues": ExportSource(
+        "球队及所属联赛",
+        ["ID", "TeamName", "TeamWealth", "TeamFoundYear", "TeamLocation",
+         "SupporterCount", "StadiumName", "Nickname", "BelongingLeague", "LeagueName"],
+        """
+        SELECT T.ID, T.TeamName, T.TeamWealth, T.TeamFoundYear, T.TeamLocation,
+               T.SupporterCount, T.StadiumName, T.Nickname, T.BelongingLeague, L.LeagueName
+        FROM Teams T LEFT JOIN League L ON L.ID = T.BelongingLeague
+        ORDER BY T.TeamName
+        """
+    ),
+    "staff_teams": ExportSource(
+        "员工及所属球队",
+        ["ID", "Name", "Ability", "Fame", "EmployedTeamID", "TeamName", "LeagueName"],
+        f"""
+        SELECT S.ID, S.Name, {_RAW_ABILITY_SQL}, S.Fame, S.EmployedTeamID,
+               T.TeamName, L.LeagueName
+        FROM Staff S
+        LEFT JOIN Teams T ON T.ID = S.EmployedTeamID
+        LEFT JOIN League L ON L.ID = T.BelongingLeague
+        ORDER BY S.ID
+        """
+    ),
+}
+
+
+def detect_format(path: str) -> tuple:
+    """Return (format, gzip) from a file name such as ``staff.jsonl.gz``."""
+    name = path.lower()
+    compress = name.endswith(".gz")
+    if compress:
+        name = name[:-3]
+    for fmt in EXPORT_FORMATS:
+        if name.endswith("." + fmt):
+            return fmt, compress
+    return "csv", compress
+
+
+def _open_output(path: str, compress: bool):
+    """Open the output file as text, gzip-compressed if requested."""
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export_table(conn: sqlite3.Connection, source: str, path: str,
+                 fmt: Optional[str] = None, compress: Optional[bool] = None,
+                 labels: Optional[Dict[str, str]] = None,
+                 chunk_size: int = EXPORT_CHUNK_SIZE,
+                 progress: Optional[Callable[[int], None]] = None) -> int:
+    """Stream an export source to a file and return the number of rows.
+
+    fmt and compress default to what the file name suggests. labels maps
+    column names to CSV/TSV header titles; JSON Lines always uses the
+    column names as keys. progress(rows) is called after each chunk.
+    """
+    detected_fmt, detected_compress = detect_format(path)
+    fmt = fmt or detected_fmt
+    compress = detected_compress if compress is None else compress
+    if source not in EXPORT_SOURCES:
+        raise ValueError(f"未知的导出数据: {source}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+
+    with _open_output(path, compress) as f:
+        rows_written = write_table(conn, source, f, fmt, labels, chunk_size, progress)
+    logger.info(f"已导出 {EXPORT_SOURCES[source].title} {rows_written} 行到: {path}")
+    return rows_written
+
+
+def write_table(conn: sqlite3.Connection, source: str, f, fmt: str = "csv",
+                labels: Optional[Dict[str, str]] = None,
+                chunk_size: int = EXPORT_CHUNK_SIZE,
+                progress: Optional[Callable[[int], None]] = None) -> int:
+    """Stream an export source to an open text file (e.g. stdout)."""
+    if source not in EXPORT_SOURCES:
+        raise ValueError(f"未知的导出数据: {source}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+
+    export_source = EXPORT_SOURCES[source]
+    rows_written = 0
+
+    # 使用独立游标，不影响连接上的其他查询
+    cursor = conn.cursor()
+    try:
+        cursor.execute(export_source.query)
+        write_rows = _row_writer(f, fmt, export_source.columns, labels)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            write_rows(rows)
+            rows_written += len(rows)
+            if progress:
+                progress(rows_written)
+    finally:
+        cursor.close()
+    return rows_written
+
+
+def _row_writer(f, fmt: str, columns: List[str], labels: Optional[Dict[str, str]]):
+    """Write the header (if any) and return a function writing a chunk of rows."""
+    if fmt == "jsonl":
+        def write_rows(rows):
+            f.writelines(
+                json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n"
+                for row in rows
+            )
+        return write_rows
+
+    writer = csv.writer(f, dialect="excel-tab" if fmt == "tsv" else "excel")
+    writer.writerow([(labels or {}).get(column, column) for column in columns])
+
+    def write_rows(rows):
+        writer.writerows(tuple(row) for row in rows)
+    return write_rows
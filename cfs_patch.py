@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Row-level change tracking and patch files.
+
+A patch is a JSON file listing the changed columns of individual rows
+with their old and new values. Applying a patch replays it onto another
+save database in one transaction; a change whose row no longer holds the
+old values is reported as a conflict instead of being overwritten
+(unless forced). Qt-free.
+"""
+
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("TeamEditor.patch")
+
+PATCH_FORMAT = "cfs-patch"
+PATCH_VERSION = 1
+
+
+class PatchError(ValueError):
+    """Raised when a patch file is malformed or refers to unknown columns."""
+
+
+class RowChange:
+    """Changed columns of one row: {column: value} before and after."""
+
+    def __init__(self, table: str, row_id: int, old: Dict[str, Any], new: Dict[str, Any]):
+        self.table = table
+        self.row_id = row_id
+        self.old = old
+        self.new = new
+
+    def __repr__(self) -> str:
+        return f"RowChange({self.table!r}, {self.row_id!r}, {self.old!r}, {self.new!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"table": self.table, "id": self.row_id, "old": self.old, "new": self.new}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RowChange":
+        try:
+            change = cls(data["table"], int(data["id"]), dict(data["old"]), dict(data["new"]))
+        except (KeyError, TypeError, ValueError) as e:
+            raise PatchError(f"补丁条目格式错误: {data!r}") from e
+        if not change.new:
+            raise PatchError(f"补丁条目没有修改任何列: {data!r}")
+        return change
+
+
+class PatchConflict:
+    """A change that could not be applied, with the reason."""
+
+    def __init__(self, change: RowChange, reason: str, current: Optional[Dict[str, Any]] = None):
+        self.change = change
+        self.reason = reason
+        self.current = current
+
+    def __str__(self) -> str:
+        return f"{self.change.table} ID {self.change.row_id}: {self.reason}"
+
+
+class PatchResult:
+    """Outcome of applying a patch."""
+
+    def __init__(self):
+        self.applied: List[RowChange] = []
+        # 目标中已是新值、无需写入的修改
+        self.skipped: List[RowChange] = []
+        self.conflicts: List[PatchConflict] = []
+
+    def report(self) -> str:
+        """Return a readable list of the conflicts."""
+        return "\n".join(str(conflict) for conflict in self.conflicts)
+
+
+def diff_row(table: str, row_id: int, old: Dict[str, Any], new: Dict[str, Any]) -> Optional[RowChange]:
+    """Return the change between two versions of a row, or None if equal."""
+    columns = [column for column in new if old.get(column) != new[column]]
+    if not columns:
+        return None
+    return RowChange(
+        table, row_id,
+        {column: old.get(column) for column in columns},
+        {column: new[column] for column in columns}
+    )
+
+
+def compact_changes(changes: Iterable[RowChange]) -> List[RowChange]:
+    """Merge repeated edits of the same row into one change per row.
+
+    The first old value and the last new value of each column are kept;
+    columns that ended up unchanged are dropped.
+    """
+    merged: Dict[tuple, RowChange] = {}
+    for change in changes:
+        key = (change.table, change.row_id)
+        current = merged.get(key)
+        if current is None:
+            merged[key] = RowChange(change.table, change.row_id, dict(change.old), dict(change.new))
+            continue
+        for column, value in change.old.items():
+            current.old.setdefault(column, value)
+        current.new.update(change.new)
+
+    result = []
+    for change in merged.values():
+        compacted = diff_row(change.table, change.row_id, change.old, change.new)
+        if compacted:
+            result.append(compacted)
+    return result
+
+
+def write_patch(changes: Iterable[RowChange], path: str, source: str = "") -> int:
+    """Write the compacted changes to a patch file and return their count."""
+    compacted = compact_changes(changes)
+    patch = {
+        "format": PATCH_FORMAT,
+        "version": PATCH_VERSION,
+        "source": source,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "changes": [change.to_dict() for change in compacted],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(patch, f, ensure_ascii=False, indent=1)
+    logger.info(f"已导出 {len(compacted)} 条修改到补丁: {path}")
+    return len(compacted)
+
+
+def read_patch(path: str) -> List[RowChange]:
+    """Read the changes of a patch file."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            patch = json.load(f)
+    except json.JSONDecodeError as e:
+        raise PatchError(f"补丁文件不是有效的JSON: {e}") from e
+
+    if not isinstance(patch, dict) or patch.get("format") != PATCH_FORMAT:
+        raise PatchError("不是CFS补丁文件")
+    if patch.get("version") != PATCH_VERSION:
+        raise PatchError(f"不支持的补丁版本: {patch.get('version')}")
+    return [RowChange.from_dict(item) for item in patch.get("changes", [])]
+
+
+def apply_changes(conn: sqlite3.Connection, changes: Sequence[RowChange],
+                  columns: Dict[str, Sequence[str]], force: bool = False,
+                  expressions: Optional[Dict[str, Dict[str, Tuple[str, str]]]] = None) -> PatchResult:
+    """Apply changes in one transaction.
+
+    columns lists the columns a patch may write per table; anything else
+    is rejected before the transaction starts. expressions maps virtual
+    columns to a (read expression, parameterised assignment) pair, e.g.
+    a key inside a JSON column. A change is a conflict if its row is
+    missing or (unless force) no longer holds the old values; conflicting
+    changes are skipped and the rest are applied. Changes whose row
+    already holds the new values are reported in skipped.
+    """
+    for change in changes:
+        allowed = columns.get(change.table)
+        if allowed is None:
+            raise PatchError(f"补丁包含不允许修改的表: {change.table}")
+        if not change.new:
+            raise PatchError(f"补丁条目没有修改任何列: {change.table} ID {change.row_id}")
+        unknown = set(change.new) - set(allowed)
+        if unknown:
+            raise PatchError(f"补丁包含不允许修改的列: {change.table}.{', '.join(sorted(unknown))}")
+
+    result = PatchResult()
+    with conn:
+        for change in changes:
+            names = list(change.new)
+            table_expressions = (expressions or {}).get(change.table, {})
+            selects = [table_expressions.get(name, (name,))[0] for name in names]
+            row = conn.execute(
+                f"SELECT {', '.join(selects)} FROM {change.table} WHERE ID = ?",
+                (change.row_id,)
+            ).fetchone()
+            if row is None:
+                result.conflicts.append(PatchConflict(change, "记录不存在"))
+                continue
+
+            current = dict(zip(names, tuple(row)))
+            if current == change.new:
+                # 目标中已是新值
+                result.skipped.append(change)
+                continue
+            mismatched = [
+                name for name in names
+                if name in change.old and current[name] != change.old[name]
+            ]
+            if mismatched and not force:
+                result.conflicts.append(PatchConflict(
+                    change, f"字段已被修改: {', '.join(mismatched)}", current
+                ))
+                continue
+
+            assignments = [
+                table_expressions[name][1] if name in table_expressions else f"{name} = ?"
+                for name in names
+            ]
+            conn.execute(
+                f"UPDATE {change.table} SET {', '.join(assignments)} WHERE ID = ?",
+                [change.new[name] for name in names] + [change.row_id]
+            )
+            result.applied.append(change)
+
+    logger.info(
+        f"已应用补丁: {len(result.applied)} 条修改, {len(result.skipped)} 条已是新值, "
+        f"{len(result.conflicts)} 个冲突"
+    )
+    return result
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite FTS5 sidecar index for team and staff search.
+
+The index lives in a separate file next to the save database
+(``<save>.db.search.sqlite``) so that the save file itself is never
+modified. It records the fingerprint of the save database it was built
+from and is rebuilt when that fingerprint no longer matches. Qt-free.
+"""
+
+import logging
+import os
+import sqlite3
+from typing import List, Optional, Sequence
+
+logger = logging.getLogger("TeamEditor.fts")
+
+SIDECAR_SUFFIX = ".search.sqlite"
+
+TEAM_FTS_COLUMNS = ["TeamName", "Nickname", "TeamLocation", "StadiumName"]
+
+REBUILD_BATCH_SIZE = 5000
+
+
+def sidecar_path(db_path: str) -> str:
+    """Return the sidecar file path for a save database."""
+    return db_path + SIDECAR_SUFFIX
+
+
+def database_fingerprint(db_path: str) -> str:
+    """Fingerprint a save database (and its WAL file) by size and mtime."""
+    parts = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            parts.append("-")
+            continue
+        parts.append(f"{stat.st_size}:{stat.st_mtime_ns}")
+    return "|".join(parts)
+
+
+def _match_phrase(text: str) -> str:
+    """Quote text as a single FTS5 phrase."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+class FtsSidecar:
+    """FTS5 index over team text fields and staff names."""
+
+    # 版本2起以实体ID作为FTS rowid，旧索引会被重建
+    SCHEMA_VERSION = "2"
+
+    def __init__(self, db_path: str):
+        """Open (creating if needed) the sidecar of a save database."""
+        self.db_path = db_path
+        self.path = sidecar_path(db_path)
+        self.conn = sqlite3.connect(self.path)
+        self.tokenizer = ""
+        self._ensure_schema()
+
+    def close(self):
+        """Close the sidecar connection."""
+        if self.conn:
+            self.conn.close()
+        self.conn = None
+
+    def _ensure_schema(self):
+        """Create the index tables, preferring the trigram tokenizer."""
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        if self._meta("schema_version") != self.SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS team_fts")
+            self.conn.execute("DROP TABLE IF EXISTS staff_fts")
+            self.conn.execute("DELETE FROM meta")
+
+        self.tokenizer = self._meta("tokenizer") or ""
+        if not self.tokenizer:
+            # trigram 分词器支持中文子串搜索（SQLite 3.34+），不支持时退回 unicode61
+            for tokenizer in ("trigram", "unicode61"):
+                try:
+                    self._create_tables(tokenizer)
+                    self.tokenizer = tokenizer
+                    break
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"FTS5分词器 {tokenizer} 不可用: {e}")
+            else:
+                raise sqlite3.OperationalError("SQLite 未启用 FTS5")
+
+        self._set_meta("schema_version", self.SCHEMA_VERSION)
+        self._set_meta("tokenizer", self.tokenizer)
+        self.conn.commit()
+
+    def _create_tables(self, tokenizer: str):
+        """Create the FTS5 tables with the given tokenizer.
+
+        The rowid of each FTS row is the team or staff ID, so single-row
+        updates are rowid lookups instead of full-table scans.
+        """
+        self.conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS team_fts USING fts5("
+            f"{', '.join(TEAM_FTS_COLUMNS)}, tokenize='{tokenizer}')"
+        )
+        self.conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS staff_fts USING fts5(Name, tokenize='{tokenizer}')"
+        )
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def is_current(self) -> bool:
+        """Whether the index was built from the save database as it is now."""
+        return self._meta("fingerprint") == database_fingerprint(self.db_path)
+
+    def mark_synced(self):
+        """Record that the index matches the save database after our own edit."""
+        self._set_meta("fingerprint", database_fingerprint(self.db_path))
+        self.conn.commit()
+
+    def rebuild(self, source: sqlite3.Connection):
+        """Rebuild both indexes from the save database connection."""
+        logger.info(f"正在重建搜索索引: {self.path}")
+        with self.conn:
+            self.conn.execute("DELETE FROM team_fts")
+            self.conn.execute("DELETE FROM staff_fts")
+
+            cursor = source.execute(f"SELECT ID, {', '.join(TEAM_FTS_COLUMNS)} FROM Teams")
+            placeholders = ", ".join("?" * (len(TEAM_FTS_COLUMNS) + 1))
+            while True:
+                rows = cursor.fetchmany(REBUILD_BATCH_SIZE)
+                if not rows:
+                    break
+                self.conn.executemany(
+                    f"INSERT INTO team_fts (rowid, {', '.join(TEAM_FTS_COLUMNS)}) VALUES ({placeholders})",
+                    [tuple(row) for row in rows]
+                )
+
+            cursor = source.execute("SELECT ID, Name FROM Staff")
+            while True:
+                rows = cursor.fetchmany(REBUILD_BATCH_SIZE)
+                if not rows:
+                    break
+                self.conn.executemany(
+                    "INSERT INTO staff_fts (rowid, Name) VALUES (?, ?)",
+                    [tuple(row) for row in rows]
+                )
+        self.mark_synced()
+
+    def update_team(self, team_id: int, values: dict):
+        """Replace the indexed text of one team."""
+        with self.conn:
+            self.conn.execute("DELETE FROM team_fts WHERE rowid = ?", (team_id,))
+            self.conn.execute(
+                f"INSERT INTO team_fts (rowid, {', '.join(TEAM_FTS_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(TEAM_FTS_COLUMNS) + 1))})",
+                [team_id] + [values.get(column) for column in TEAM_FTS_COLUMNS]
+            )
+
+    def update_staff(self, staff_id: int, name: str):
+        """Replace the indexed name of one staff member."""
+        with self.conn:
+            self.conn.execute("DELETE FROM staff_fts WHERE rowid = ?", (staff_id,))
+            self.conn.execute("INSERT INTO staff_fts (rowid, Name) VALUES (?, ?)", (staff_id, name))
+
+    def _search(self, table: str, columns: List[str], terms: Sequence[str],
+                limit: Optional[int]) -> List[int]:
+        """Return the IDs whose indexed text contains every term."""
+        terms = [term.strip() for term in terms if term.strip()]
+        if not terms:
+            return []
+        clauses = []
+        params: List[str] = []
+        # trigram 无法匹配少于3个字符的词，这些词改为在索引表上做 LIKE 扫描
+        phrases = [term for term in terms if not (self.tokenizer == "trigram" and len(term) < 3)]
+        if phrases:
+            clauses.append(f"{table} MATCH ?")
+            params.append(" AND ".join(_match_phrase(term) for term in phrases))
+        for term in terms:
+            if term in phrases:
+                continue
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append("(" + " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in columns) + ")")
+            params.extend([pattern] * len(columns))
+        order_sql = " ORDER BY rank" if phrases else ""
+        limit_sql = f" LIMIT {int(limit)}" if limit else ""
+        rows = self.conn.execute(
+            f"SELECT rowid FROM {table} WHERE {' AND '.join(clauses)}{order_sql}{limit_sql}", params
+        )
+        return [row[0] for row in rows]
+
+    def search_teams(self, terms: Sequence[str], limit: Optional[int] = None) -> List[int]:
+        """Return IDs of teams whose name, nickname, location or stadium contain every term."""
+        return self._search("team_fts", TEAM_FTS_COLUMNS, terms, limit)
+
+    def search_staff(self, text: str, limit: Optional[int] = None) -> List[int]:
+        """Return IDs of staff whose name contains text."""
+        return self._search("staff_fts", ["Name"], [text], limit)
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Team logo cache.
+
+Logos are decoded and scaled on a thread pool and kept as ``QPixmap``s in
+a bounded LRU cache keyed by file path and mtime. Once a path has been
+seen, later lookups are served from memory without touching the disk;
+the cache must be told when a logo file is rewritten (``invalidate``).
+Neighbouring logos can be prefetched at a lower priority.
+
+Scaled logos are also kept on disk in the user cache directory, named by
+a hash of the source file content, so that later sessions read the small
+thumbnail instead of decoding the full-size image again. A small index
+maps each source file's path, size and mtime to its content hash, so a
+cached thumbnail is found with one ``os.stat`` and the source file is
+only read and hashed when it is new or has changed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QStandardPaths, QThreadPool, Qt, Signal
+from PySide6.QtGui import QImage, QPixmap
+
+logger = logging.getLogger("TeamEditor.logos")
+
+LOGO_CACHE_MAX_BYTES = 16 * 1024 * 1024  # 128x128 的标志约 64KB，约 256 个
+
+LOAD_PRIORITY = 1  # 当前球队的标志优先于预取
+PREFETCH_PRIORITY = 0
+
+THUMBNAIL_DIR_NAME = "logo-thumbnails"
+THUMBNAIL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+THUMBNAIL_INDEX_NAME = "index.sqlite"
+
+
+class ThumbnailStore:
+    """Directory of pre-scaled logos keyed by source size and content hash."""
+
+    def __init__(self, directory: str, max_bytes: int = THUMBNAIL_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # 源文件 (路径, 大小, mtime) -> 内容哈希；由解码线程和清理线程共用
+        self._index: Optional[sqlite3.Connection] = None
+        self._index_lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> Optional["ThumbnailStore"]:
+        """Return the store in the user cache directory, or None if unavailable."""
+        base = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        if not base:
+            return None
+        directory = os.path.join(base, THUMBNAIL_DIR_NAME)
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"无法创建缩略图缓存目录 {directory}: {e}")
+            return None
+        return cls(directory)
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        """Return the content hash that names the thumbnails of a file."""
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def path_for(self, digest: str, file_size: int, size: int) -> str:
+        """Return the thumbnail path of an image file's content at a given size."""
+        return os.path.join(self.directory, f"{digest}-{file_size}-{size}.png")
+
+    def _index_execute(self, sql: str, params=()) -> list:
+        """Run one statement on the digest index; errors are logged and return []."""
+        with self._index_lock:
+            try:
+                if self._index is None:
+                    self._index = sqlite3.connect(
+                        os.path.join(self.directory, THUMBNAIL_INDEX_NAME),
+                        check_same_thread=False, isolation_level=None
+                    )
+                    self._index.execute(
+                        "CREATE TABLE IF NOT EXISTS digests ("
+                        "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT)"
+                    )
+                return self._index.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"访问缩略图索引失败: {e}")
+                return []
+
+    def known_digest(self, path: str, stat: os.stat_result) -> Optional[str]:
+        """Return the recorded content hash of a file if its size and mtime are unchanged."""
+        rows = self._index_execute(
+            "SELECT digest FROM digests WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        )
+        return rows[0][0] if rows else None
+
+    def remember_digest(self, path: str, stat: os.stat_result, digest: str):
+        """Record the content hash of a file at its current size and mtime."""
+        self._index_execute(
+            "INSERT OR REPLACE INTO digests (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+            (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, digest)
+        )
+
+    def read(self, path: str) -> Optional[QImage]:
+        """Return a cached thumbnail, marking it as recently used."""
+        image = QImage(path)
+        if image.isNull():
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return image
+
+    def write(self, path: str, image: QImage):
+        """Store a thumbnail (written to a temporary file first)."""
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if image.save(temp_path, "PNG"):
+                os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"写入缩略图缓存失败 {path}: {e}")
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def cleanup(self):
+        """Delete the least recently used thumbnails beyond max_bytes."""
+        entries = []
+        total = 0
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(".png"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        except OSError as e:
+            logger.warning(f"读取缩略图缓存失败: {e}")
+            return
+
+        entries.sort()
+        removed = 0
+        digests = set()
+        for _, file_size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= file_size
+            removed += 1
+            digests.add(os.path.basename(path).split("-", 1)[0])
+        if removed:
+            # 删除了缩略图的源文件下次需要重新读取，其索引项一并删除
+            self._index_execute(
+                "DELETE FROM digests WHERE digest IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted(digests)),)
+            )
+            logger.info(f"已清理 {removed} 个缩略图缓存文件")
+
+
+class _CleanupTask(QRunnable):
+    """Trim the thumbnail store on a worker thread."""
+
+    def __init__(self, store: ThumbnailStore):
+        super().__init__()
+        self.store = store
+
+    def run(self):
+        self.store.cleanup()
+
+
+class _DecodeSignals(QObject):
+    """Signals of a decode task (QRunnable itself cannot emit signals)."""
+
+    decoded = Signal(int, str, object, object)  # token, path, mtime_ns, QImage or None
+
+
+class LogoDecodeTask(QRunnable):
+    """Read and scale one logo file on a worker thread."""
+
+    def __init__(self, token: int, path: str, size: int, signals: _DecodeSignals,
+                 store: Optional[ThumbnailStore] = None):
+        super().__init__()
+        self.token = token
+        self.path = path
+        self.size = size
+        self.signals = signals
+        self.store = store
+
+    def run(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            # 文件不存在
+            self.signals.decoded.emit(self.token, self.path, None, None)
+            return
+
+        # 大小和mtime未变的文件直接读取缩略图，不再读取和哈希原图
+        digest = self.store.known_digest(self.path, stat) if self.store else None
+        if digest:
+            image = self.store.read(self.store.path_for(digest, stat.st_size, self.size))
+            if image is not None:
+                self.signals.decoded.emit(self.token, self.path, stat.st_mtime_ns, image)
+                return
+
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self.signals.decoded.emit(self.token, self.path, None, None)
+            return
+
+        thumbnail_path = None
+        image = None
+        if self.store:
+            digest = self.store.digest(data)
+            self.store.remember_digest(self.path, stat, digest)
+            thumbnail_path = self.store.path_for(digest, len(data), self.size)
+            image = self.store.read(thumbnail_path)
+        if image is None:
+            image = QImage.fromData(data)
+            if not image.isNull():
+                image = image.scaled(self.size, self.size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                if thumbnail_path:
+                    self.store.write(thumbnail_path, image)
+        self.signals.decoded.emit(self.token, self.path, stat.st_mtime_ns, image)
+
+
+class LogoCache(QObject):
+    """LRU cache of scaled team logos with asynchronous loading."""
+
+    logo_loaded = Signal(str, object)  # path, QPixmap (None if the file does not exist)
+    logo_failed = Signal(str)
+
+    def __init__(self, size: int, max_bytes: int = LOGO_CACHE_MAX_BYTES,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.size = size
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self._pixmaps: "OrderedDict[Tuple[str, Optional[int]], Optional[QPixmap]]" = OrderedDict()
+        self._mtimes: Dict[str, Optional[int]] = {}
+        self._pending: Dict[str, int] = {}
+        self._tasks: Dict[int, LogoDecodeTask] = {}
+        self._next_token = 0
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+        self._signals = _DecodeSignals(self)
+        self._signals.decoded.connect(self._on_decoded)
+
+        self.store = ThumbnailStore.default()
+        if self.store:
+            self.pool.start(_CleanupTask(self.store), PREFETCH_PRIORITY - 1)
+
+    def max_prefetch_depth(self) -> int:
+        """Largest prefetch depth whose 2×depth neighbours fit in the cache next to the current logo."""
+        logo_bytes = self.size * self.size * 4
+        return max(0, (self.max_bytes // logo_bytes - 1) // 2)
+
+    def lookup(self, path: str) -> Tuple[bool, Optional[QPixmap]]:
+        """Return (found, pixmap) from memory; pixmap is None for a missing file."""
+        if path not in self._mtimes:
+            return False, None
+        key = (path, self._mtimes[path])
+        if key not in self._pixmaps:
+            return False, None
+        self._pixmaps.move_to_end(key)
+        return True, self._pixmaps[key]
+
+    def load(self, path: str, priority: int = LOAD_PRIORITY):
+        """Decode a logo in the background; logo_loaded is emitted when done."""
+        if path in self._pending:
+            return
+        self._next_token += 1
+        self._pending[path] = self._next_token
+        task = LogoDecodeTask(self._next_token, path, self.size, self._signals, self.store)
+        # 任务对象由缓存持有直到完成，以便 cancel_queued 可以从队列中取回
+        task.setAutoDelete(False)
+        self._tasks[task.token] = task
+        self.pool.start(task, priority)
+
+    def cancel_queued(self, keep: Iterable[str] = ()):
+        """Remove queued decodes of paths not in keep; running ones finish normally."""
+        keep = set(keep)
+        for token, task in list(self._tasks.items()):
+            if task.path not in keep and self.pool.tryTake(task):
+                del self._tasks[token]
+                if self._pending.get(task.path) == token:
+                    del self._pending[task.path]
+
+    def prefetch(self, paths: Iterable[str]):
+        """Decode logos that are likely to be shown next, if not cached yet."""
+        for path in paths:
+            if not self.lookup(path)[0]:
+                self.load(path, PREFETCH_PRIORITY)
+
+    def invalidate(self, path: str):
+        """Forget a logo whose file has been rewritten."""
+        self._pending.pop(path, None)
+        mtime = self._mtimes.pop(path, None)
+        self._discard((path, mtime))
+
+    def clear(self):
+        """Drop every cached logo."""
+        self.cancel_queued()
+        self._pending.clear()
+        self._mtimes.clear()
+        self._pixmaps.clear()
+        self._bytes = 0
+
+    @staticmethod
+    def _pixmap_bytes(pixmap: Optional[QPixmap]) -> int:
+        if pixmap is None:
+            return 0
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def _discard(self, key: Tuple[str, Optional[int]]):
+        """Remove one cache entry."""
+        if key in self._pixmaps:
+            self._bytes -= self._pixmap_bytes(self._pixmaps.pop(key))
+
+    def _on_decoded(self, token: int, path: str, mtime: Optional[int], image: Optional[QImage]):
+        """Store a decoded logo (runs on the GUI thread)."""
+        self._tasks.pop(token, None)
+        if self._pending.get(path) != token:
+            # 解码期间文件已被替换，丢弃旧结果
+            return
+        del self._pending[path]
+
+        if image is not None and image.isNull():
+            logger.error(f"加载Logo失败: {path}")
+            self.logo_failed.emit(path)
+            return
+
+        pixmap = QPixmap.fromImage(image) if image is not None else None
+        if path in self._mtimes:
+            self._discard((path, self._mtimes[path]))
+        self._mtimes[path] = mtime
+        self._pixmaps[(path, mtime)] = pixmap
+        self._bytes += self._pixmap_bytes(pixmap)
+        while self._bytes > self.max_bytes and len(self._pixmaps) > 1:
+            (old_path, old_mtime), _ = next(iter(self._pixmaps.items()))
+            self._discard((old_path, old_mtime))
+            self._mtimes.pop(old_path, None)
+
+        self.logo_loaded.emit(path, pixmap)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bulk import of team logos from a folder.
+
+Image files are matched to teams by file name: ``123.png`` or ``L123.png``
+selects team 123, any other name is compared with the team names. The
+matched files are decoded, scaled and written as ``L{id}.png`` across a
+process pool. Only the pool workers import Qt, so planning is Qt-free.
+"""
+
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from cfs_database import TeamRecord
+from team_search import normalize_search_text
+
+logger = logging.getLogger("TeamEditor.logos")
+
+LOGO_FILE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".gif"}
+
+_ID_FILENAME_RE = re.compile(r"^[Ll]?(\d+)$")
+
+
+class LogoImportPlan:
+    """Result of matching a folder of images to teams (the dry run)."""
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.matches: List[Tuple[str, int]] = []  # (源文件路径, 球队ID)
+        self.unmatched: List[Tuple[str, str]] = []  # (文件名, 原因)
+
+    def report(self) -> str:
+        """Return a readable list of the files that will not be imported."""
+        return "\n".join(f"{name}: {reason}" for name, reason in self.unmatched)
+
+
+def _team_name_index(teams: Iterable[TeamRecord]) -> Dict[str, List[int]]:
+    """Map normalized team names to team IDs."""
+    index: Dict[str, List[int]] = {}
+    for team in teams:
+        if team.name:
+            index.setdefault(normalize_search_text(str(team.name).strip()), []).append(team.id)
+    return index
+
+
+def plan_logo_import(folder: str, teams: Iterable[TeamRecord]) -> LogoImportPlan:
+    """Match the image files of a folder to teams without writing anything."""
+    teams = list(teams)
+    team_ids = {team.id for team in teams}
+    names = _team_name_index(teams)
+    plan = LogoImportPlan(folder)
+    claimed: Dict[int, str] = {}
+
+    for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+        if not entry.is_file():
+            continue
+        stem, ext = os.path.splitext(entry.name)
+        if ext.lower() not in LOGO_FILE_EXTENSIONS:
+            continue
+
+        match = _ID_FILENAME_RE.match(stem)
+        if match:
+            team_id = int(match.group(1))
+            if team_id not in team_ids:
+                plan.unmatched.append((entry.name, f"不存在ID为 {team_id} 的球队"))
+                continue
+        else:
+            ids = names.get(normalize_search_text(stem.strip()), [])
+            if not ids:
+                plan.unmatched.append((entry.name, "没有同名球队"))
+                continue
+            if len(ids) > 1:
+                plan.unmatched.append((entry.name, f"有 {len(ids)} 个同名球队"))
+                continue
+            team_id = ids[0]
+
+        if team_id in claimed:
+            plan.unmatched.append((entry.name, f"球队 {team_id} 已匹配 {claimed[team_id]}"))
+            continue
+        claimed[team_id] = entry.name
+        plan.matches.append((entry.path, team_id))
+
+    return plan
+
+
+def _import_logo(source: str, target: str, size: int) -> Optional[str]:
+    """Scale one image and save it as PNG; return an error message or None.
+
+    Runs in a pool worker process.
+    """
+    from PySide6.QtCore import Qt
+    from PySide6.QtGui import QImage
+
+    image = QImage(source)
+    if image.isNull():
+        return "无法读取图片"
+    image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    if not image.save(target, "PNG"):
+        return "无法写入文件"
+    return None
+
+
+def import_logos(plan: LogoImportPlan, target_dir: str, size: int,
+                 progress: Optional[Callable[[int, int], bool]] = None,
+                 max_workers: Optional[int] = None) -> Tuple[List[int], List[Tuple[str, str]]]:
+    """Write the matched logos as ``L{id}.png`` using all CPU cores.
+
+    progress(done, total) is called after each file; returning False
+    cancels the files that have not started yet. Returns the imported
+    team IDs and the (file name, error) pairs of failed files.
+    """
+    imported: List[int] = []
+    failed: List[Tuple[str, str]] = []
+    total = len(plan.matches)
+    if not total:
+        return imported, failed
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_import_logo, source, os.path.join(target_dir, f"L{team_id}.png"), size):
+                (source, team_id)
+            for source, team_id in plan.matches
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            if future.cancelled():
+                continue
+            source, team_id = futures[future]
+            try:
+                error = future.result()
+            except Exception as e:
+                error = str(e)
+            if error:
+                logger.error(f"导入Logo失败 {source}: {error}")
+                failed.append((os.path.basename(source), error))
+            else:
+                imported.append(team_id)
+
+            if progress and progress(done, total) is False:
+                for pending in futures:
+                    pending.cancel()
+                progress = None
+
+    return imported, failed
@@ -6,23 +6,49 @@ Author: 卡尔纳斯
 Version: 2.0.0 (PySide6 Refactored Version)
 """
 
-import json
 import logging
+import multiprocessing
 import os
 import sqlite3
 import sys
-from typing import Any, Dict, List, Optional, Tuple
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 
-from PySide6.QtCore import Qt, QSize
-from PySide6.QtGui import QIcon, QPixmap, QImage, QFont, QColor, QPalette
+_STARTUP_TIME = time.perf_counter()
+
+# 命令行模式（python main.py cli <命令> ...）不导入Qt
+if __name__ == "__main__" and sys.argv[1:2] == ["cli"]:
+    from cfs_cli import main as cli_main
+    sys.exit(cli_main(sys.argv[2:]))
+
+from PySide6.QtCore import (
+    Qt, QAbstractListModel, QAbstractTableModel, QModelIndex, QObject,
+    QPersistentModelIndex, QSortFilterProxyModel, QThread, QTimer, Signal
+)
+from PySide6.QtGui import QIcon, QPixmap, QImage, QFont, QColor, QPainter, QPalette
+# 只在对话框中使用的控件（批量修改、重新平衡、导出等）在打开对话框时才导入
 from PySide6.QtWidgets import (
-    QApplication, QDialog, QFileDialog, QFormLayout, QFrame, QGroupBox,
-    QHBoxLayout, QLabel, QLineEdit, QListWidget, QListWidgetItem, QMainWindow,
-    QMessageBox, QPushButton, QScrollArea, QSplitter, QTreeWidget,
-    QTreeWidgetItem, QVBoxLayout, QWidget, QGraphicsDropShadowEffect
+    QApplication, QDialog, QFileDialog, QFormLayout, QFrame,
+    QHBoxLayout, QLabel, QLineEdit, QListView, QMainWindow, QProgressBar,
+    QMessageBox, QPushButton, QScrollArea, QSplitter, QTreeView,
+    QVBoxLayout, QWidget, QGraphicsDropShadowEffect
+)
+
+from cfs_patch import PatchError
+from cfs_database import (
+    CfsDatabase, EditSession, StaffRecord, TeamRecord, TEAM_FIELDS, TEAM_NUMERIC_FIELDS
+)
+from team_search import (
+    QuerySyntaxError, TeamSearchIndex, normalize_search_text, parse_team_query
 )
-from qt_material import apply_stylesheet
+
+if TYPE_CHECKING:
+    # 仅用于类型注解。菜单功能使用的模块在首次使用时才导入，以缩短启动时间
+    # （staff_rebalance 会导入 numpy，logo_import 会导入进程池）
+    from bulk_edit import BulkTeamEdit
+    from logo_cache import LogoCache
+    from staff_rebalance import Rebalance, StaffArrays
 
 # Constants
 APP_TITLE = "CFS球队编辑器 BY.卡尔纳斯"
@@ -30,6 +56,18 @@ DEFAULT_WINDOW_SIZE = (1100, 750)
 MIN_WINDOW_SIZE = (900, 650)
 ICON_PATH = "favicon.ico"
 LOGO_SIZE = (128, 128)
+SEARCH_DEBOUNCE_MS = 250  # 输入停止多久后执行实时搜索
+LOGO_PREFETCH_DEPTH = 3  # 预取当前球队前后各多少个球队的标志（--prefetch-depth 可修改）
+SELECTION_DELAY_MS = 30  # 快速切换选择时只显示最后选中的球队
+
+# 导出文件类型（文件名未带扩展名时使用所选类型的扩展名）
+EXPORT_FILE_FILTERS = [
+    ("CSV文件 (*.csv)", ".csv"),
+    ("TSV文件 (*.tsv)", ".tsv"),
+    ("JSON Lines文件 (*.jsonl)", ".jsonl"),
+    ("压缩CSV文件 (*.csv.gz)", ".csv.gz"),
+    ("压缩JSON Lines文件 (*.jsonl.gz)", ".jsonl.gz"),
+]
 
 # Modern color scheme
 COLORS = {
@@ -66,6 +104,35 @@ logging.basicConfig(
 logger = logging.getLogger("TeamEditor")
 
 
+class StartupProfiler:
+    """记录启动各阶段的耗时（使用 --profile-startup 启用）。"""
+
+    def __init__(self, start: float):
+        self.enabled = False
+        self.start = start
+        self._last = start
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str):
+        """记录从上一阶段结束到现在的耗时。"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self):
+        """把各阶段耗时写入日志。"""
+        if not self.enabled:
+            return
+        for phase, seconds in self.phases:
+            logger.info(f"启动阶段 {phase}: {seconds * 1000:.1f} ms")
+        logger.info(f"启动总耗时: {(self._last - self.start) * 1000:.1f} ms")
+
+
+startup_profiler = StartupProfiler(_STARTUP_TIME)
+
+
 def create_horizontal_line():
     """Create a horizontal separator line."""
     line = QFrame()
@@ -98,17 +165,13 @@ def create_default_icon():
         # 设置背景色为透明
         icon_image.fill(QColor(0, 0, 0, 0))
         
-        # 填充简单的蓝色背景
-        for y in range(icon_size):
-            for x in range(icon_size):
-                # 计算到中心的距离
-                dx = x - icon_size/2
-                dy = y - icon_size/2
-                dist = (dx*dx + dy*dy) ** 0.5
-                
-                # 绘制一个简单的圆形图标
-                if dist <= icon_size/2:
-                    icon_image.setPixelColor(x, y, QColor(COLORS['primary']))
+        # 绘制一个简单的圆形图标
+        painter = QPainter(icon_image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(COLORS['primary']))
+        painter.drawEllipse(0, 0, icon_size, icon_size)
+        painter.end()
         
         # 保存图标
         icon_image.save(ICON_PATH)
@@ -118,76 +181,15 @@ def create_default_icon():
         # 创建图标失败不是致命错误，可以继续运行
 
 
-class TeamRecord:
-    """Team record data class."""
-
-    def __init__(self, record_data: tuple):
-        """Initialize team data from database record."""
-        self.id = record_data[0]
-        self.name = record_data[1]
-        self.wealth = record_data[2]
-        self.found_year = record_data[3]
-        self.location = record_data[4]
-        self.supporter_count = record_data[5]
-        self.stadium_name = record_data[6]
-        self.nickname = record_data[7]
-        self.league_id = record_data[8]
-
-    def __str__(self) -> str:
-        """Return string representation of the team."""
-        return f"{self.name} (ID: {self.id})"
-
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert team record to dictionary."""
-        return {
-            "ID": self.id,
-            "TeamName": self.name,
-            "TeamWealth": self.wealth,
-            "TeamFoundYear": self.found_year,
-            "TeamLocation": self.location,
-            "SupporterCount": self.supporter_count,
-            "StadiumName": self.stadium_name,
-            "Nickname": self.nickname,
-            "BelongingLeague": self.league_id
-        }
-
-    def as_search_string(self) -> str:
-        """Return string used for searching."""
-        return f"{self.id}{self.name}{self.wealth}{self.found_year}{self.location}{self.supporter_count}{self.stadium_name}{self.nickname}{self.league_id}"
-
-
-class StaffRecord:
-    """Staff record data class."""
-
-    def __init__(self, record_data: tuple):
-        """Initialize staff data from database record."""
-        self.id = record_data[0]
-        self.name = record_data[1]
-        self.ability_json = record_data[2]
-        self.fame = record_data[3]
-        self.team_id = record_data[4]
-
-    def get_ability(self) -> int:
-        """Parse ability value from JSON."""
-        try:
-            ability_data = json.loads(self.ability_json)
-            return ability_data.get('rawAbility', 0)
-        except (json.JSONDecodeError, TypeError, AttributeError) as e:
-            logger.error(f"Failed to parse ability JSON: {e}")
-            return 0
-
-    def update_ability(self, new_ability: int) -> str:
-        """Update ability value JSON."""
-        return json.dumps({"rawAbility": int(new_ability)})
-
-
 class StaffEditDialog(QDialog):
     """员工信息编辑对话框。"""
 
-    def __init__(self, parent, staff_record: StaffRecord, update_callback):
+    def __init__(self, parent, staff_record: StaffRecord, update_callback,
+                 staged: Optional[Dict[str, Any]] = None):
         super().__init__(parent)
         self.staff_record = staff_record
         self.update_callback = update_callback
+        staged = staged or {}
 
         self.setWindowTitle(f"编辑员工 - {staff_record.name}")
         self.setMinimumSize(480, 320)
@@ -287,9 +289,11 @@ class StaffEditDialog(QDialog):
         label_style = f"color: {COLORS['text']}; font-weight: bold; font-size: 13px;"
 
         # 输入框
-        self.name_edit = QLineEdit(staff_record.name)
-        self.ability_edit = QLineEdit(str(staff_record.get_ability()))
-        self.fame_edit = QLineEdit(str(staff_record.fame))
+        # 有暂存修改时显示暂存的值
+        ability = staged.get("rawAbility", staff_record.get_ability())
+        self.name_edit = QLineEdit(staged.get("Name", staff_record.name))
+        self.ability_edit = QLineEdit(str(ability))
+        self.fame_edit = QLineEdit(str(staged.get("Fame", staff_record.fame)))
         
         # 设置输入框样式
         input_widgets = [self.name_edit, self.ability_edit, self.fame_edit]
@@ -391,20 +395,642 @@ class StaffEditDialog(QDialog):
             QMessageBox.critical(self, "错误", f"更新失败: {str(e)}")
 
 
+class BulkTeamEditDialog(QDialog):
+    """批量修改球队数值字段的对话框，可预览修改结果。"""
+
+    PREVIEW_LIMIT = 200  # 预览中最多列出的球队数
+
+    def __init__(self, parent, records: List[TeamRecord], field_labels: Dict[str, str]):
+        from PySide6.QtGui import QStandardItemModel
+
+        super().__init__(parent)
+        self.records = records
+        self.field_labels = field_labels
+        self.edit: Optional["BulkTeamEdit"] = None
+        self.changes: List[Tuple[TeamRecord, Dict[str, Any], Dict[str, Any]]] = []
+
+        self.setWindowTitle(f"批量修改球队 - {len(records)} 个球队")
+        self.setMinimumSize(640, 520)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(12)
+
+        hint_label = QLabel(
+            "为要修改的字段填写公式，如 \"×1.2\"、\"+10%\"、\"-500\" 或 \"supporters / 100\"，"
+            "公式中可使用其他数值字段（取修改前的值）。留空的字段不修改。"
+        )
+        hint_label.setWordWrap(True)
+        hint_label.setStyleSheet(f"color: {COLORS['light_text']}; font-size: 12px;")
+        layout.addWidget(hint_label)
+
+        form_layout = QFormLayout()
+        form_layout.setLabelAlignment(Qt.AlignRight)
+        from bulk_edit import BULK_EDIT_FIELDS
+
+        self.formula_edits: Dict[str, QLineEdit] = {}
+        for field in BULK_EDIT_FIELDS:
+            edit = QLineEdit()
+            edit.setPlaceholderText("不修改")
+            edit.textChanged.connect(self._invalidate_preview)
+            self.formula_edits[field] = edit
+            form_layout.addRow(f"{field_labels.get(field, field)}:", edit)
+        layout.addLayout(form_layout)
+
+        self.preview_model = QStandardItemModel(self)
+        self.preview_view = QTreeView()
+        self.preview_view.setModel(self.preview_model)
+        self.preview_view.setRootIsDecorated(False)
+        self.preview_view.setAlternatingRowColors(True)
+        self.preview_view.setEditTriggers(QTreeView.NoEditTriggers)
+        layout.addWidget(self.preview_view, 1)
+
+        self.summary_label = QLabel("")
+        self.summary_label.setStyleSheet(f"color: {COLORS['light_text']}; font-size: 12px;")
+        layout.addWidget(self.summary_label)
+
+        button_layout = QHBoxLayout()
+        button_layout.setSpacing(12)
+        cancel_button = QPushButton("取消")
+        cancel_button.setProperty("class", "secondary")
+        preview_button = QPushButton("预览")
+        preview_button.setProperty("class", "secondary")
+        self.apply_button = QPushButton("应用")
+        self.apply_button.setEnabled(False)
+
+        cancel_button.clicked.connect(self.reject)
+        preview_button.clicked.connect(self.update_preview)
+        self.apply_button.clicked.connect(self.accept)
+
+        button_layout.addStretch()
+        button_layout.addWidget(cancel_button)
+        button_layout.addWidget(preview_button)
+        button_layout.addWidget(self.apply_button)
+        layout.addLayout(button_layout)
+
+    def _invalidate_preview(self):
+        """公式改变后需要重新预览才能应用。"""
+        self.edit = None
+        self.changes = []
+        self.apply_button.setEnabled(False)
+
+    def update_preview(self):
+        """解析公式并列出会被修改的球队。"""
+        from PySide6.QtGui import QStandardItem
+        from bulk_edit import BulkTeamEdit, FormulaError
+
+        self._invalidate_preview()
+        self.preview_model.clear()
+        try:
+            edit = BulkTeamEdit({field: widget.text() for field, widget in self.formula_edits.items()})
+        except FormulaError as e:
+            self.summary_label.setText(str(e))
+            return
+
+        changes = edit.preview(self.records)
+        headers = ["ID", "球队名称"] + [self.field_labels.get(field, field) for field in edit.fields]
+        self.preview_model.setHorizontalHeaderLabels(headers)
+        for record, old, new in changes[:self.PREVIEW_LIMIT]:
+            row = [QStandardItem(str(record.id)), QStandardItem(str(record.name))]
+            for field in edit.fields:
+                text = str(old[field]) if old[field] == new[field] else f"{old[field]} → {new[field]}"
+                row.append(QStandardItem(text))
+            self.preview_model.appendRow(row)
+        for column in range(len(headers)):
+            self.preview_view.resizeColumnToContents(column)
+
+        summary = f"{len(changes)} / {len(self.records)} 个球队将被修改"
+        if len(changes) > self.PREVIEW_LIMIT:
+            summary += f"（仅预览前 {self.PREVIEW_LIMIT} 个）"
+        self.summary_label.setText(summary)
+        self.edit = edit
+        self.changes = changes
+        self.apply_button.setEnabled(bool(changes))
+
+
+class HistogramWidget(QWidget):
+    """绘制修改前后两组直方图的控件。"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.edges = []
+        self.before = []
+        self.after = []
+        self.setMinimumHeight(160)
+
+    def set_data(self, edges, before, after):
+        """设置分箱边界和修改前后的计数。"""
+        self.edges = list(edges)
+        self.before = list(before)
+        self.after = list(after)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(COLORS["card"]))
+        if not self.before:
+            return
+
+        margin = 20
+        width = self.width() - 2 * margin
+        height = self.height() - 2 * margin
+        peak = max(max(self.before), max(self.after), 1)
+        bar_width = width / len(self.before)
+        painter.setPen(Qt.NoPen)
+        for counts, color in ((self.before, QColor(COLORS["secondary_light"])),
+                              (self.after, QColor(COLORS["primary"]))):
+            color.setAlpha(140)
+            painter.setBrush(color)
+            for i, count in enumerate(counts):
+                bar_height = height * count / peak
+                painter.drawRect(
+                    int(margin + i * bar_width), int(margin + height - bar_height),
+                    max(int(bar_width) - 1, 1), int(bar_height)
+                )
+
+        painter.setPen(QColor(COLORS["light_text"]))
+        painter.drawText(margin, self.height() - 4, f"{self.edges[0]:g}")
+        painter.drawText(self.width() - margin - 40, self.height() - 4, f"{self.edges[-1]:g}")
+        painter.setPen(QColor(COLORS["secondary_light"]))
+        painter.drawText(margin, 14, "修改前")
+        painter.setPen(QColor(COLORS["primary"]))
+        painter.drawText(margin + 60, 14, "修改后")
+
+
+class StaffRebalanceDialog(QDialog):
+    """对全部员工的能力值或知名度进行重新平衡的对话框。
+
+    staff_rebalance 会导入 numpy，只在打开此对话框时才导入。
+    """
+
+    def __init__(self, parent, arrays: "StaffArrays"):
+        from PySide6.QtWidgets import QCheckBox, QComboBox
+        from staff_rebalance import REBALANCE_FIELDS
+
+        super().__init__(parent)
+        self.arrays = arrays
+        self.rebalance: Optional["Rebalance"] = None
+        self.rows: List[Tuple[int, int]] = []
+
+        self.setWindowTitle(f"员工重新平衡 - {len(arrays)} 个员工")
+        self.setMinimumSize(600, 560)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(12)
+
+        form_layout = QFormLayout()
+        form_layout.setLabelAlignment(Qt.AlignRight)
+        self.field_combo = QComboBox()
+        for field, label in REBALANCE_FIELDS.items():
+            self.field_combo.addItem(label, field)
+        form_layout.addRow("字段:", self.field_combo)
+
+        # 各步骤按表中顺序执行，未勾选的步骤跳过
+        self.linear_check = QCheckBox("线性缩放")
+        self.scale_edit = QLineEdit("1.0")
+        self.offset_edit = QLineEdit("0")
+        linear_layout = QHBoxLayout()
+        linear_layout.addWidget(QLabel("×"))
+        linear_layout.addWidget(self.scale_edit)
+        linear_layout.addWidget(QLabel("+"))
+        linear_layout.addWidget(self.offset_edit)
+        form_layout.addRow(self.linear_check, linear_layout)
+
+        self.percentile_check = QCheckBox("百分位映射")
+        self.percentile_edit = QLineEdit("0:20, 50:80, 100:180")
+        self.percentile_edit.setToolTip("百分位:目标值，按排名把员工映射到目标值之间")
+        form_layout.addRow(self.percentile_check, self.percentile_edit)
+
+        self.wealth_check = QCheckBox("按球队财富缩放")
+        self.wealth_edit = QLineEdit("0.2")
+        self.wealth_edit.setToolTip("乘以 (球队财富 / 财富中位数) 的指数次方，无球队的员工不缩放")
+        form_layout.addRow(self.wealth_check, self.wealth_edit)
+
+        self.clamp_check = QCheckBox("限制范围")
+        self.low_edit = QLineEdit("1")
+        self.high_edit = QLineEdit("200")
+        clamp_layout = QHBoxLayout()
+        clamp_layout.addWidget(self.low_edit)
+        clamp_layout.addWidget(QLabel("~"))
+        clamp_layout.addWidget(self.high_edit)
+        form_layout.addRow(self.clamp_check, clamp_layout)
+        layout.addLayout(form_layout)
+
+        for widget in (self.scale_edit, self.offset_edit, self.percentile_edit,
+                       self.wealth_edit, self.low_edit, self.high_edit):
+            widget.textChanged.connect(self._invalidate_preview)
+        for widget in (self.linear_check, self.percentile_check, self.wealth_check, self.clamp_check):
+            widget.toggled.connect(self._invalidate_preview)
+        self.field_combo.currentIndexChanged.connect(self._invalidate_preview)
+
+        self.histogram = HistogramWidget()
+        layout.addWidget(self.histogram, 1)
+
+        self.summary_label = QLabel("")
+        self.summary_label.setWordWrap(True)
+        self.summary_label.setStyleSheet(f"color: {COLORS['light_text']}; font-size: 12px;")
+        layout.addWidget(self.summary_label)
+
+        button_layout = QHBoxLayout()
+        button_layout.setSpacing(12)
+        cancel_button = QPushButton("取消")
+        cancel_button.setProperty("class", "secondary")
+        preview_button = QPushButton("预览")
+        preview_button.setProperty("class", "secondary")
+        self.apply_button = QPushButton("应用")
+        self.apply_button.setEnabled(False)
+
+        cancel_button.clicked.connect(self.reject)
+        preview_button.clicked.connect(self.update_preview)
+        self.apply_button.clicked.connect(self.accept)
+
+        button_layout.addStretch()
+        button_layout.addWidget(cancel_button)
+        button_layout.addWidget(preview_button)
+        button_layout.addWidget(self.apply_button)
+        layout.addLayout(button_layout)
+
+    def _invalidate_preview(self):
+        """参数改变后需要重新预览才能应用。"""
+        self.rebalance = None
+        self.rows = []
+        self.apply_button.setEnabled(False)
+
+    def _build_rebalance(self) -> "Rebalance":
+        """根据勾选的步骤创建 Rebalance。"""
+        from staff_rebalance import Rebalance, RebalanceError
+
+        rebalance = Rebalance(self.field_combo.currentData())
+        try:
+            if self.linear_check.isChecked():
+                rebalance.linear(float(self.scale_edit.text()), float(self.offset_edit.text()))
+            if self.percentile_check.isChecked():
+                anchors = []
+                for item in self.percentile_edit.text().split(","):
+                    percentile, _, value = item.partition(":")
+                    anchors.append((float(percentile), float(value)))
+                rebalance.percentile_map(anchors)
+            if self.wealth_check.isChecked():
+                rebalance.scale_by_wealth(float(self.wealth_edit.text()))
+            if self.clamp_check.isChecked():
+                low, high = self.low_edit.text().strip(), self.high_edit.text().strip()
+                rebalance.clamp(float(low) if low else None, float(high) if high else None)
+        except ValueError as e:
+            if isinstance(e, RebalanceError):
+                raise
+            raise RebalanceError("参数必须为有效的数字")
+        if not len(rebalance):
+            raise RebalanceError("请至少勾选一个步骤")
+        return rebalance
+
+    def update_preview(self):
+        """计算新值并显示修改前后的分布。"""
+        from staff_rebalance import RebalanceError, histogram
+
+        self._invalidate_preview()
+        try:
+            rebalance = self._build_rebalance()
+        except RebalanceError as e:
+            self.summary_label.setText(str(e))
+            return
+
+        new_values = rebalance.apply(self.arrays)
+        old_values = self.arrays.values(rebalance.field)
+        self.histogram.set_data(*histogram(old_values, new_values))
+        self.rows = rebalance.changed_rows(self.arrays, new_values)
+        self.rebalance = rebalance
+        self.summary_label.setText(
+            f"{rebalance.describe()}\n{len(self.rows)} / {len(self.arrays)} 个员工将被修改"
+        )
+        self.apply_button.setEnabled(bool(self.rows))
+
+
+class TeamListModel(QAbstractListModel):
+    """球队列表模型，显示文本和提示在 data() 中按需计算。"""
+
+    EMPTY_TEXT = "没有找到球队记录"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._records: List[TeamRecord] = []
+        self._rows: Dict[int, int] = {}  # 球队ID -> 行号
+        # 暂存的修改 {球队ID: {列名: 新值}}，有修改的行以斜体显示暂存的值
+        self.staged: Dict[int, Dict[str, Any]] = {}
+
+    def set_records(self, records: List[TeamRecord]):
+        """替换显示的球队记录（一次模型重置）。"""
+        self.beginResetModel()
+        self._records = records
+        self._rows = {record.id: row for row, record in enumerate(records)}
+        self.endResetModel()
+
+    def record(self, row: int) -> Optional[TeamRecord]:
+        """返回指定行的球队记录，空列表提示行返回None。"""
+        if 0 <= row < len(self._records):
+            return self._records[row]
+        return None
+
+    def row_of(self, record: TeamRecord) -> int:
+        """返回球队所在行，不在列表中时返回-1。"""
+        row = self._rows.get(record.id, -1)
+        if 0 <= row < len(self._records) and self._records[row] is record:
+            return row
+        return -1
+
+    def append_records(self, records: List[TeamRecord]):
+        """在列表末尾追加记录（分块加载时使用）。"""
+        if not records:
+            return
+        if not self._records:
+            # 替换空列表提示行
+            self.beginResetModel()
+            self._records.extend(records)
+            self._rows = {record.id: row for row, record in enumerate(self._records)}
+            self.endResetModel()
+            return
+        first = len(self._records)
+        self.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+        self._records.extend(records)
+        self._rows.update((record.id, row) for row, record in enumerate(records, first))
+        self.endInsertRows()
+
+    def refresh_record(self, record: TeamRecord):
+        """通知视图重绘显示该球队的行。"""
+        self.refresh_records([record])
+
+    def refresh_records(self, records: Iterable[TeamRecord]):
+        """通知视图重绘显示这些球队的行（一次 dataChanged）。"""
+        rows = [row for row in map(self.row_of, records) if row >= 0]
+        if rows:
+            self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)))
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        # 没有记录时显示一行提示信息
+        return len(self._records) or 1
+
+    def flags(self, index):
+        if not self._records:
+            return Qt.NoItemFlags
+        return super().flags(index)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if not self._records:
+            if role == Qt.DisplayRole:
+                return self.EMPTY_TEXT
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignCenter
+            return None
+
+        record = self._records[index.row()]
+        staged = self.staged.get(record.id)
+        if role == Qt.DisplayRole:
+            if staged:
+                name_text = staged.get("TeamName", record.name)
+                nickname = staged.get("Nickname", record.nickname)
+            else:
+                name_text, nickname = record.name, record.nickname
+            if nickname:
+                name_text += f" ({nickname})"
+            return name_text
+        if role == Qt.ToolTipRole:
+            tooltip = f"ID: {record.id}\n地区: {record.location}\n成立年份: {record.found_year}"
+            return tooltip + "\n有未提交的修改" if staged else tooltip
+        if staged and role == Qt.FontRole:
+            font = QFont()
+            font.setItalic(True)
+            return font
+        if staged and role == Qt.ForegroundRole:
+            return QColor(COLORS['warning'])
+        return None
+
+
+class StaffTableModel(QAbstractTableModel):
+    """员工表格模型，按批次向视图提供行（canFetchMore/fetchMore）。"""
+
+    HEADERS = ["ID", "姓名", "能力值", "知名度"]
+    ABILITY_COLUMN = 2
+    FETCH_BATCH = 200
+    EMPTY_TEXT = "该球队暂无员工记录"
+
+    RECORD_ROLE = Qt.UserRole
+    SORT_ROLE = Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._records: List[StaffRecord] = []
+        self._loaded = 0
+        self._show_empty_hint = False
+        # 暂存的修改 {员工ID: {列名: 新值}}，有修改的行以斜体显示暂存的值
+        self.staged: Dict[int, Dict[str, Any]] = {}
+
+    def set_records(self, records: List[StaffRecord], show_empty_hint: bool = True):
+        """替换员工记录，只先提供第一批行。"""
+        self.beginResetModel()
+        self._records = records
+        self._loaded = min(len(records), self.FETCH_BATCH)
+        self._show_empty_hint = show_empty_hint and not records
+        self.endResetModel()
+
+    def fetch_all(self):
+        """一次性加载剩余的全部行（排序时需要完整数据）。"""
+        while self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    def refresh_record(self, staff: StaffRecord):
+        """通知视图重绘显示该员工的行。"""
+        try:
+            row = self._records.index(staff)
+        except ValueError:
+            return
+        if row < self._loaded:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return 1 if self._show_empty_hint else self._loaded
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent) -> bool:
+        return not parent.isValid() and self._loaded < len(self._records)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        count = min(self.FETCH_BATCH, len(self._records) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if self._show_empty_hint:
+            return Qt.NoItemFlags
+        return super().flags(index)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        column = index.column()
+        if self._show_empty_hint:
+            if column == 1 and role == Qt.DisplayRole:
+                return self.EMPTY_TEXT
+            return None
+
+        staff = self._records[index.row()]
+        if role == self.RECORD_ROLE:
+            return staff
+
+        staged = self.staged.get(staff.id)
+        if staged:
+            values = (
+                staff.id, staged.get("Name", staff.name),
+                staged.get("rawAbility", staff.ability), staged.get("Fame", staff.fame)
+            )
+        else:
+            values = (staff.id, staff.name, staff.ability, staff.fame)
+
+        if role == Qt.DisplayRole:
+            return str(values[column])
+        if role == self.SORT_ROLE:
+            return values[column]
+        if staged and role == Qt.FontRole:
+            font = QFont()
+            font.setItalic(True)
+            return font
+        if role == Qt.ForegroundRole:
+            if staged:
+                return QColor(COLORS['warning'])
+            if column == self.ABILITY_COLUMN:
+                # 根据能力值设置颜色
+                if values[column] >= 80:
+                    return QColor(COLORS['success'])
+                if values[column] >= 60:
+                    return QColor(COLORS['primary'])
+        return None
+
+
+class DatabaseLoader(QObject):
+    """在后台线程中使用独立连接分块读取数据库。"""
+
+    leagues_loaded = Signal(object)
+    teams_loaded = Signal(object)
+    staff_loaded = Signal(object)
+    progress = Signal(int, int)
+    finished = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._cancel_requested = False
+
+    def cancel(self):
+        """请求取消加载（在下一块数据前生效）。"""
+        self._cancel_requested = True
+
+    def run(self):
+        """读取联赛、球队和员工，并在后台建立搜索索引。"""
+        db = None
+        try:
+            db = CfsDatabase(self.path)
+            self.leagues_loaded.emit(db.load_leagues())
+
+            total = db.count_rows("Teams") + db.count_rows("Staff")
+            done = 0
+            self.progress.emit(done, total)
+
+            teams = []
+            for chunk in db.iter_teams():
+                if self._cancel_requested:
+                    self.cancelled.emit()
+                    return
+                teams.extend(chunk)
+                self.teams_loaded.emit(chunk)
+                done += len(chunk)
+                self.progress.emit(done, total)
+
+            for chunk in db.iter_staff():
+                if self._cancel_requested:
+                    self.cancelled.emit()
+                    return
+                self.staff_loaded.emit(chunk)
+                done += len(chunk)
+                self.progress.emit(done, total)
+
+            self.finished.emit(TeamSearchIndex(teams))
+
+        except sqlite3.Error as e:
+            logger.error(f"加载数据库失败: {e}")
+            self.failed.emit(f"数据库错误：{str(e)}")
+        except Exception as e:
+            logger.error(f"加载数据库失败: {e}", exc_info=True)
+            self.failed.emit(f"加载失败：{str(e)}")
+        finally:
+            if db:
+                db.close()
+
+
+class DatabaseExporter(QObject):
+    """在后台线程中用在线备份或 VACUUM INTO 导出数据库。"""
+
+    progress = Signal(int, int)
+    finished = Signal(str)
+    failed = Signal(str)
+
+    def __init__(self, db: CfsDatabase, file_path: str, compact: bool = False):
+        super().__init__()
+        self.db = db
+        self.file_path = file_path
+        self.compact = compact
+
+    def run(self):
+        """执行导出，使用独立连接。"""
+        try:
+            if self.compact:
+                self.db.export_compact(self.file_path)
+            else:
+                self.db.export_backup(self.file_path, progress=self.progress.emit)
+            self.finished.emit(self.file_path)
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.error(f"导出数据库失败: {e}", exc_info=True)
+            self.failed.emit(f"导出失败：{str(e)}")
+
+
 class TeamDatabaseViewer(QMainWindow):
     """CFS Team Database Viewer and Editor."""
 
-    def __init__(self):
-        """初始化应用程序。"""
+    def __init__(self, logo_prefetch_depth: int = LOGO_PREFETCH_DEPTH):
+        """初始化应用程序。
+
+        logo_prefetch_depth 为预取当前球队前后各多少个球队的标志，
+        创建标志缓存时按缓存容量限制，保证预取不会挤出当前球队的标志。
+        """
         super().__init__()
+        self.logo_prefetch_depth = max(0, logo_prefetch_depth)
 
         # 设置应用程序基本属性
         self.setWindowTitle(APP_TITLE)
         self.resize(*DEFAULT_WINDOW_SIZE)
         self.setMinimumSize(*MIN_WINDOW_SIZE)
 
-        # 设置应用程序样式
-        self.setup_style()
+        # 全局样式表较大，窗口首次显示后再应用（见 _finish_startup）
 
         # 设置图标
         self._set_application_icon()
@@ -414,8 +1040,30 @@ class TeamDatabaseViewer(QMainWindow):
 
         # 创建界面
         self._create_widgets()
+        self._create_menu()
         self._create_layout()
         self._connect_signals()
+        startup_profiler.mark("创建界面")
+
+        # 加载进度条和取消按钮
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.setMaximumHeight(16)
+        self.cancel_load_btn = QPushButton("取消加载")
+        self.cancel_load_btn.setProperty("class", "secondary")
+        self.cancel_load_btn.clicked.connect(self.cancel_loading)
+        self.statusBar().addPermanentWidget(self.load_progress)
+        self.statusBar().addPermanentWidget(self.cancel_load_btn)
+        self.load_progress.hide()
+        self.cancel_load_btn.hide()
+
+        # 导出数据库进度条
+        self.export_progress = QProgressBar()
+        self.export_progress.setMaximumWidth(200)
+        self.export_progress.setMaximumHeight(16)
+        self.export_progress.setFormat("导出 %p%")
+        self.statusBar().addPermanentWidget(self.export_progress)
+        self.export_progress.hide()
 
         # 设置初始状态栏消息
         self.statusBar().showMessage("就绪")
@@ -433,18 +1081,6 @@ class TeamDatabaseViewer(QMainWindow):
                 font-size: 12px;
                 color: {COLORS['text']};
             }}
-            QGroupBox {{
-                background-color: {COLORS['card']};
-                border-radius: 8px;
-                border: none;
-                margin-top: 20px;
-                font-weight: bold;
-            }}
-            QGroupBox::title {{
-                subcontrol-origin: margin;
-                left: 10px;
-                padding: 0 5px;
-            }}
             QScrollArea {{
                 border: none;
                 background-color: transparent;
@@ -452,7 +1088,7 @@ class TeamDatabaseViewer(QMainWindow):
             QLabel {{
                 background-color: transparent;
             }}
-            QListWidget, QTreeWidget {{
+            QListView, QTreeView {{
                 background-color: {COLORS['card']};
                 border-radius: 6px;
                 border: none;
@@ -461,16 +1097,15 @@ class TeamDatabaseViewer(QMainWindow):
                 selection-background-color: {COLORS['primary']};
                 selection-color: white;
             }}
-            QListWidget::item, QTreeWidget::item {{
+            QListView::item, QTreeView::item {{
                 padding: 8px;
                 border-radius: 4px;
                 margin: 2px 0px;
-                transition: background-color 0.3s;
             }}
-            QListWidget::item:hover, QTreeWidget::item:hover {{
+            QListView::item:hover, QTreeView::item:hover {{
                 background-color: {COLORS['hover']};
             }}
-            QListWidget::item:selected, QTreeWidget::item:selected {{
+            QListView::item:selected, QTreeView::item:selected {{
                 background-color: {COLORS['primary']};
                 color: white;
             }}
@@ -485,7 +1120,6 @@ class TeamDatabaseViewer(QMainWindow):
             }}
             QPushButton:hover {{
                 background-color: {COLORS['primary_dark']};
-                transition: background-color 0.2s;
             }}
             QPushButton:pressed {{
                 background-color: {COLORS['primary_dark']};
@@ -495,20 +1129,19 @@ class TeamDatabaseViewer(QMainWindow):
                 background-color: {COLORS['disabled']};
                 color: {COLORS['light_text']};
             }}
-            QLineEdit, QComboBox, QSpinBox, QDateEdit {{
+            QLineEdit, QComboBox {{
                 border: 1px solid {COLORS['border']};
                 border-radius: 4px;
                 padding: 8px;
                 background-color: white;
                 selection-background-color: {COLORS['primary']};
                 selection-color: white;
-                transition: border 0.2s, background-color 0.2s;
             }}
-            QLineEdit:focus, QComboBox:focus, QSpinBox:focus, QDateEdit:focus {{
+            QLineEdit:focus, QComboBox:focus {{
                 border: 1px solid {COLORS['primary']};
                 background-color: white;
             }}
-            QLineEdit:hover, QComboBox:hover, QSpinBox:hover, QDateEdit:hover {{
+            QLineEdit:hover, QComboBox:hover {{
                 background-color: {COLORS['hover']};
             }}
             QComboBox::drop-down {{
@@ -580,39 +1213,6 @@ class TeamDatabaseViewer(QMainWindow):
             QCheckBox::indicator:hover {{
                 border: 1px solid {COLORS['primary']};
             }}
-            QRadioButton::indicator {{
-                width: 18px;
-                height: 18px;
-                border: 1px solid {COLORS['border']};
-                border-radius: 9px;
-            }}
-            QRadioButton::indicator:checked {{
-                background-color: {COLORS['primary']};
-                border: 1px solid {COLORS['primary']};
-            }}
-            QRadioButton::indicator:hover {{
-                border: 1px solid {COLORS['primary']};
-            }}
-            QTabWidget::pane {{
-                border: none;
-                background-color: {COLORS['card']};
-                border-radius: 8px;
-            }}
-            QTabBar::tab {{
-                background-color: {COLORS['background']};
-                color: {COLORS['light_text']};
-                border-top-left-radius: 4px;
-                border-top-right-radius: 4px;
-                padding: 8px 15px;
-                min-width: 80px;
-            }}
-            QTabBar::tab:selected {{
-                background-color: {COLORS['primary']};
-                color: white;
-            }}
-            QTabBar::tab:hover:!selected {{
-                background-color: {COLORS['hover']};
-            }}
             QToolTip {{
                 border: 1px solid {COLORS['border']};
                 padding: 5px;
@@ -688,10 +1288,7 @@ class TeamDatabaseViewer(QMainWindow):
     def _init_data(self):
         """初始化应用数据。"""
         # 字段信息
-        self.fields = [
-            "ID", "TeamName", "TeamWealth", "TeamFoundYear",
-            "TeamLocation", "SupporterCount", "StadiumName", "Nickname", "BelongingLeague"
-        ]
+        self.fields = list(TEAM_FIELDS)
 
         self.field_labels = {
             "ID": "编号",
@@ -707,23 +1304,39 @@ class TeamDatabaseViewer(QMainWindow):
 
         # 应用数据
         self.team_records = []
+        self.team_by_id: Dict[int, TeamRecord] = {}
         self.displayed_team_records = []
+        self.search_index = TeamSearchIndex()
         self.staff_records = []
-        self.conn = None
-        self.cursor = None
+        self.staff_by_id: Dict[int, StaffRecord] = {}
+        self.staff_by_team: Dict[int, List[StaffRecord]] = {}
+        self.db: Optional[CfsDatabase] = None
+        self.edit_session: Optional[EditSession] = None
+        self.loader: Optional[DatabaseLoader] = None
+        self.logo_cache: Optional["LogoCache"] = None  # 与详情面板一起创建
+        self.loader_thread: Optional[QThread] = None
+        self.exporter: Optional[DatabaseExporter] = None
+        self.exporter_thread: Optional[QThread] = None
         self.current_team_id = None
         self.current_search = ""
+        self.search_is_structured = False
+        self.search_error = ""
+        self._restoring_selection = False
         self.db_directory = ""
         self.leagues = {}
-        self.temp_data = {}
         
         # UI对象引用
+        self.detail_panel = None
+        self.detail_placeholder = None
         self.logo_label = None
         self.logo_hint = None
         self.league_label = None  # 将在_create_team_detail_panel中创建
         self.entries = {}
         self.team_list = None
+        self.team_model = None
         self.staff_tree = None
+        self.staff_model = None
+        self.staff_proxy = None
         self.list_status_label = None
 
     def _create_widgets(self):
@@ -735,19 +1348,42 @@ class TeamDatabaseViewer(QMainWindow):
         # 控制面板
         self.load_btn = QPushButton("加载数据库")
         
-        self.save_btn = QPushButton("保存球队修改")
+        self.save_btn = QPushButton("暂存球队修改")
         self.save_btn.setProperty("class", "success")
 
+        self.commit_btn = QPushButton("提交修改")
+        self.commit_btn.setProperty("class", "success")
+        self.commit_btn.setEnabled(False)
+
+        self.discard_btn = QPushButton("放弃修改")
+        self.discard_btn.setProperty("class", "secondary")
+        self.discard_btn.setEnabled(False)
+
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("输入搜索关键词...")
+        self.search_input.setPlaceholderText("输入搜索关键词，或字段条件如 league:3 wealth>5000 name:~城")
         
         self.search_btn = QPushButton("搜索")
+
+        # 实时搜索防抖定时器
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+
+        # 选择合并定时器：按住方向键时只处理最后一次选择
+        self.selection_timer = QTimer(self)
+        self.selection_timer.setSingleShot(True)
+        self.selection_timer.setInterval(SELECTION_DELAY_MS)
+        self._pending_selection = QPersistentModelIndex()
         
         self.clear_search_btn = QPushButton("清除")
         self.clear_search_btn.setProperty("class", "secondary")
 
         # 球队列表
-        self.team_list = QListWidget()
+        self.team_model = TeamListModel(self)
+        self.team_list = QListView()
+        self.team_list.setModel(self.team_model)
+        self.team_list.setUniformItemSizes(True)
+        self.team_list.setAlternatingRowColors(True)
         self.list_status_label = QLabel("总计: 0 个球队")
         self.list_status_label.setStyleSheet(f"color: {COLORS['light_text']}; font-size: 11px;")
         
@@ -756,57 +1392,23 @@ class TeamDatabaseViewer(QMainWindow):
         self.export_list_btn = QPushButton("导出列表")
         self.export_list_btn.setProperty("class", "secondary")
 
-        # 球队详情区域
-        self.detail_scroll_area = QScrollArea()
-        self.detail_scroll_area.setWidgetResizable(True)
-        self.detail_content = QWidget()
-        self.detail_scroll_area.setWidget(self.detail_content)
-        apply_shadow(self.detail_scroll_area)
-
-        # Logo区域
-        self.logo_label = QLabel()
-        self.logo_label.setAlignment(Qt.AlignCenter)
-        self.logo_label.setMinimumSize(150, 150)
-        self.logo_label.setStyleSheet(f"""
-            background-color: {COLORS['card']};
-            border: 1px dashed {COLORS['border']};
-            border-radius: 75px;
-        """)
-        
-        self.logo_hint = QLabel("点击可更改Logo")
-        self.logo_hint.setAlignment(Qt.AlignCenter)
-        self.logo_hint.setStyleSheet(f"color: {COLORS['light_text']}; font-size: 11px;")
-
-        # 基本信息区域
-        self.entries = {}
-
-        # 创建字段输入框
-        for field in self.fields:
-            if field == "BelongingLeague":
-                continue
-            self.entries[field] = QLineEdit()
-            if field == "ID":
-                self.entries[field].setReadOnly(True)
-                self.entries[field].setStyleSheet(f"""
-                    background-color: {COLORS['background']}; 
-                    color: {COLORS['light_text']};
-                """)
+    def _create_menu(self):
+        """创建菜单栏。"""
+        tools_menu = self.menuBar().addMenu("工具")
+        self.import_logos_action = tools_menu.addAction("批量导入Logo...")
+        self.import_logos_action.triggered.connect(self.import_logo_folder)
+        self.bulk_edit_action = tools_menu.addAction("批量修改球队...")
+        self.bulk_edit_action.triggered.connect(self.bulk_edit_teams)
+        self.rebalance_action = tools_menu.addAction("员工重新平衡...")
+        self.rebalance_action.triggered.connect(self.rebalance_staff)
+        self.export_table_action = tools_menu.addAction("导出数据表...")
+        self.export_table_action.triggered.connect(self._export_table)
+        tools_menu.addSeparator()
+        self.export_patch_action = tools_menu.addAction("导出修改补丁...")
+        self.export_patch_action.triggered.connect(self.export_patch)
+        self.apply_patch_action = tools_menu.addAction("应用修改补丁...")
+        self.apply_patch_action.triggered.connect(self.apply_patch)
 
-        # 员工表格
-        self.staff_tree = QTreeWidget()
-        self.staff_tree.setHeaderLabels(["ID", "姓名", "能力值", "知名度"])
-        self.staff_tree.setColumnWidth(0, 70)
-        self.staff_tree.setColumnWidth(1, 120)
-        self.staff_tree.setColumnWidth(2, 80)
-        self.staff_tree.setColumnWidth(3, 80)
-        self.staff_tree.setMinimumHeight(200)
-        self.staff_tree.setAlternatingRowColors(True)
-        self.staff_tree.setStyleSheet(f"""
-            QTreeView::item:alternate {{
-                background-color: {COLORS['background']};
-            }}
-        """)
-        
     def _create_layout(self):
         """创建应用界面布局。"""
         main_layout = QVBoxLayout(self.central_widget)
@@ -851,6 +1453,8 @@ class TeamDatabaseViewer(QMainWindow):
         
         button_layout.addWidget(self.load_btn)
         button_layout.addWidget(self.save_btn)
+        button_layout.addWidget(self.commit_btn)
+        button_layout.addWidget(self.discard_btn)
         button_layout.addWidget(self.export_db_btn)
         control_layout.addWidget(button_group)
 
@@ -902,9 +1506,12 @@ class TeamDatabaseViewer(QMainWindow):
         team_panel = self._create_team_list_panel()
         content_splitter.addWidget(team_panel)
 
-        # 右侧球队详情面板
-        detail_panel = self._create_team_detail_panel()
-        content_splitter.addWidget(detail_panel)
+        # 右侧球队详情面板在首次加载数据库时创建，启动时只显示提示
+        self.content_splitter = content_splitter
+        self.detail_placeholder = QLabel("请先加载数据库")
+        self.detail_placeholder.setAlignment(Qt.AlignCenter)
+        self.detail_placeholder.setStyleSheet(f"color: {COLORS['light_text']}; font-size: 14px;")
+        content_splitter.addWidget(self.detail_placeholder)
 
         # 设置分割器比例
         content_splitter.setSizes([300, 700])
@@ -963,23 +1570,24 @@ class TeamDatabaseViewer(QMainWindow):
         
         # 球队列表样式
         self.team_list.setStyleSheet(f"""
-            QListWidget {{
+            QListView {{
                 border: none;
                 background-color: {COLORS['card']};
+                alternate-background-color: {COLORS['background']};
                 padding: 5px;
             }}
-            QListWidget::item {{
+            QListView::item {{
                 padding: 10px 8px;
                 border-radius: 3px;
                 margin: 1px 0px;
                 border-bottom: 1px solid {COLORS['divider']};
             }}
-            QListWidget::item:selected {{
+            QListView::item:selected {{
                 background-color: {COLORS['primary']};
                 color: white;
                 border-bottom: 1px solid {COLORS['primary']};
             }}
-            QListWidget::item:hover:!selected {{
+            QListView::item:hover:!selected {{
                 background-color: {COLORS['hover']};
             }}
         """)
@@ -1016,29 +1624,94 @@ class TeamDatabaseViewer(QMainWindow):
         
         return panel
         
-    def _create_team_detail_panel(self):
-        """创建右侧球队详情面板。"""
-        # 详情滚动区域
+    def _create_detail_widgets(self):
+        """创建球队详情区域的组件。"""
+        # 球队详情区域
+        self.detail_scroll_area = QScrollArea()
         self.detail_scroll_area.setWidgetResizable(True)
-        self.detail_scroll_area.setStyleSheet(f"""
-            QScrollArea {{
-                background-color: transparent;
-                border: none;
-            }}
-            QScrollArea > QWidget > QWidget {{
-                background-color: transparent;
-            }}
+        self.detail_content = QWidget()
+        self.detail_scroll_area.setWidget(self.detail_content)
+        apply_shadow(self.detail_scroll_area)
+
+        # Logo区域
+        self.logo_label = QLabel()
+        self.logo_label.setAlignment(Qt.AlignCenter)
+        self.logo_label.setMinimumSize(150, 150)
+        self.logo_label.setStyleSheet(f"""
+            background-color: {COLORS['card']};
+            border: 1px dashed {COLORS['border']};
+            border-radius: 75px;
         """)
         
-        # 详情内容布局
-        detail_layout = QVBoxLayout(self.detail_content)
-        detail_layout.setContentsMargins(10, 5, 15, 15)
-        detail_layout.setSpacing(15)
+        self.logo_hint = QLabel("点击可更改Logo")
+        self.logo_hint.setAlignment(Qt.AlignCenter)
+        self.logo_hint.setStyleSheet(f"color: {COLORS['light_text']}; font-size: 11px;")
 
-        # 顶部标题区域 - 使用渐变背景
-        header = QWidget()
-        header.setObjectName("detailHeader")
-        header.setStyleSheet(f"""
+        # 基本信息区域
+        self.entries = {}
+
+        # 创建字段输入框
+        for field in self.fields:
+            if field == "BelongingLeague":
+                continue
+            self.entries[field] = QLineEdit()
+            if field == "ID":
+                self.entries[field].setReadOnly(True)
+                self.entries[field].setStyleSheet(f"""
+                    background-color: {COLORS['background']}; 
+                    color: {COLORS['light_text']};
+                """)
+
+        # 员工表格
+        self.staff_model = StaffTableModel(self)
+        self.staff_proxy = QSortFilterProxyModel(self)
+        self.staff_proxy.setSourceModel(self.staff_model)
+        self.staff_proxy.setSortRole(StaffTableModel.SORT_ROLE)
+
+        self.staff_tree = QTreeView()
+        self.staff_tree.setModel(self.staff_proxy)
+        self.staff_tree.setRootIsDecorated(False)
+        self.staff_tree.setUniformRowHeights(True)
+        self.staff_tree.setSortingEnabled(True)
+        # 默认按能力值降序
+        self.staff_tree.sortByColumn(StaffTableModel.ABILITY_COLUMN, Qt.DescendingOrder)
+        self.staff_tree.setColumnWidth(0, 70)
+        self.staff_tree.setColumnWidth(1, 120)
+        self.staff_tree.setColumnWidth(2, 80)
+        self.staff_tree.setColumnWidth(3, 80)
+        self.staff_tree.setMinimumHeight(200)
+        self.staff_tree.setAlternatingRowColors(True)
+        self.staff_tree.setStyleSheet(f"""
+            QTreeView::item:alternate {{
+                background-color: {COLORS['background']};
+            }}
+        """)
+
+    def _create_team_detail_panel(self):
+        """创建右侧球队详情面板。"""
+        self._create_detail_widgets()
+
+        # 详情滚动区域
+        self.detail_scroll_area.setWidgetResizable(True)
+        self.detail_scroll_area.setStyleSheet(f"""
+            QScrollArea {{
+                background-color: transparent;
+                border: none;
+            }}
+            QScrollArea > QWidget > QWidget {{
+                background-color: transparent;
+            }}
+        """)
+        
+        # 详情内容布局
+        detail_layout = QVBoxLayout(self.detail_content)
+        detail_layout.setContentsMargins(10, 5, 15, 15)
+        detail_layout.setSpacing(15)
+
+        # 顶部标题区域 - 使用渐变背景
+        header = QWidget()
+        header.setObjectName("detailHeader")
+        header.setStyleSheet(f"""
             #detailHeader {{
                 background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
                              stop:0 {COLORS['primary']}, stop:1 {COLORS['primary_light']});
@@ -1287,21 +1960,21 @@ class TeamDatabaseViewer(QMainWindow):
         
         # 员工树视图样式
         self.staff_tree.setStyleSheet(f"""
-            QTreeWidget {{
+            QTreeView {{
                 border: none;
                 background-color: {COLORS['card']};
                 padding: 5px;
             }}
-            QTreeWidget::item {{
+            QTreeView::item {{
                 padding: 8px 5px;
                 border-bottom: 1px solid {COLORS['divider']};
             }}
-            QTreeWidget::item:selected {{
+            QTreeView::item:selected {{
                 background-color: {COLORS['primary']};
                 color: white;
                 border-bottom: 1px solid {COLORS['primary']};
             }}
-            QTreeWidget::item:hover:!selected {{
+            QTreeView::item:hover:!selected {{
                 background-color: {COLORS['hover']};
             }}
             QHeaderView::section {{
@@ -1348,26 +2021,63 @@ class TeamDatabaseViewer(QMainWindow):
         # Control buttons
         self.load_btn.clicked.connect(self.load_database)
         self.save_btn.clicked.connect(self.save_team_changes)
+        self.commit_btn.clicked.connect(self.commit_edits)
+        self.discard_btn.clicked.connect(self.discard_edits)
         self.export_db_btn.clicked.connect(self.export_database)  # 添加导出按钮事件
 
         # Search
         self.search_btn.clicked.connect(self.search)
         self.clear_search_btn.clicked.connect(self._clear_search)
         self.search_input.returnPressed.connect(self.search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.search_timer.timeout.connect(self._live_search)
 
         # Team list
-        self.team_list.itemClicked.connect(self.on_select)
+        self.team_list.selectionModel().currentChanged.connect(self.on_select)
+        self.selection_timer.timeout.connect(self._apply_selection)
         self.refresh_list_btn.clicked.connect(self._refresh_lists)
         self.export_list_btn.clicked.connect(self._export_team_list)
 
+    def _connect_detail_signals(self):
+        """Connect signals of the team detail panel."""
         # Logo click event
         self.logo_label.mousePressEvent = self.on_logo_click
 
         # Staff table double click
-        self.staff_tree.itemDoubleClicked.connect(self.edit_staff)
+        self.staff_tree.doubleClicked.connect(self.edit_staff)
+        self.staff_tree.header().sortIndicatorChanged.connect(self._on_staff_sort_changed)
+
+    def _ensure_detail_panel(self):
+        """首次使用时创建球队详情面板，替换启动时的提示。"""
+        if self.detail_panel is not None:
+            return
+        from logo_cache import LogoCache
+
+        self.logo_cache = LogoCache(min(LOGO_SIZE), parent=self)
+        self.logo_cache.logo_loaded.connect(self._on_logo_loaded)
+        self.logo_cache.logo_failed.connect(self._on_logo_failed)
+        max_depth = self.logo_cache.max_prefetch_depth()
+        if self.logo_prefetch_depth > max_depth:
+            logger.warning(f"标志预取深度 {self.logo_prefetch_depth} 超过缓存容量，改为 {max_depth}")
+            self.logo_prefetch_depth = max_depth
+
+        sizes = self.content_splitter.sizes()
+        self.detail_panel = self._create_team_detail_panel()
+        self._connect_detail_signals()
+        self.content_splitter.replaceWidget(1, self.detail_panel)
+        self.detail_placeholder.deleteLater()
+        self.detail_placeholder = None
+        self.content_splitter.setSizes(sizes)
 
     def load_database(self):
         """加载数据库文件。"""
+        if self.loader:
+            self.show_message("警告", "数据库正在加载中，请稍候或取消加载", QMessageBox.Warning)
+            return
+
+        if not self._confirm_discard_edits():
+            return
+
         try:
             path, _ = QFileDialog.getOpenFileName(
                 self,
@@ -1382,31 +2092,16 @@ class TeamDatabaseViewer(QMainWindow):
             self.db_directory = os.path.dirname(path)
 
             # 关闭已有连接
-            if self.conn:
-                self.conn.close()
-
-            # 建立新连接
-            self.conn = sqlite3.connect(path)
-            self.conn.row_factory = sqlite3.Row  # 使用命名列访问
-            self.cursor = self.conn.cursor()
-
-            # 加载联赛信息
-            self.cursor.execute("SELECT ID, LeagueName FROM League")
-            leagues = self.cursor.fetchall()
-            self.leagues = {l['ID']: l['LeagueName'] for l in leagues}
+            if self.db:
+                self.db.close()
+                self.db = None
 
-            # 刷新数据
-            self.refresh_team_data()
-            self.refresh_staff_data()
-
-            # 更新状态
-            self.statusBar().showMessage(f"已加载数据库：{os.path.basename(path)}")
-            self.show_message(
-                "成功",
-                f"数据库加载成功！\n已加载 {len(self.team_records)} 个球队和 {len(self.staff_records)} 名员工。"
-            )
-
-            logger.info(f"已加载数据库: {path}, 球队: {len(self.team_records)}, 员工: {len(self.staff_records)}")
+            # 建立新连接（用于编辑），数据在后台线程中读取
+            self.db = CfsDatabase(path)
+            self.edit_session = EditSession(self.db)
+            self.team_model.staged = self.edit_session.edits["Teams"]
+            self.current_team_id = None
+            self._start_loading(path)
 
         except sqlite3.Error as e:
             error_msg = f"数据库错误：{str(e)}"
@@ -1418,75 +2113,221 @@ class TeamDatabaseViewer(QMainWindow):
             logger.error(error_msg, exc_info=True)
             self.show_message("错误", error_msg, QMessageBox.Critical)
 
-    def refresh_team_data(self):
-        """Refresh team data."""
-        if not self.cursor:
+    def _start_loading(self, path: str):
+        """在后台线程中读取数据库，收到第一块球队数据后列表即可使用。"""
+        self._ensure_detail_panel()
+        self.staff_model.staged = self.edit_session.edits["Staff"]
+
+        # 清空现有数据，列表模型直接显示正在加载的球队
+        self.team_records = []
+        self.team_by_id = {}
+        self.displayed_team_records = self.team_records
+        self.search_index = TeamSearchIndex()
+        # 加载期间的搜索不能在上一个数据库的结果中缩小范围，加载完成后按搜索框重新搜索
+        self.current_search = ""
+        self.search_is_structured = False
+        self.staff_records = []
+        self._index_staff()
+        self.team_model.set_records(self.team_records)
+        self.staff_model.set_records([], show_empty_hint=False)
+        self.list_status_label.setText("正在加载...")
+
+        # 重新加载时同时重新读取标志文件
+        self.selection_timer.stop()
+        self.logo_cache.clear()
+
+        self.loader = DatabaseLoader(path)
+        self.loader_thread = QThread(self)
+        self.loader.moveToThread(self.loader_thread)
+        self.loader_thread.started.connect(self.loader.run)
+
+        self.loader.leagues_loaded.connect(self._on_leagues_loaded)
+        self.loader.teams_loaded.connect(self._on_teams_loaded)
+        self.loader.staff_loaded.connect(self._on_staff_loaded)
+        self.loader.progress.connect(self._on_load_progress)
+        self.loader.finished.connect(self._on_load_finished)
+        self.loader.failed.connect(self._on_load_failed)
+        self.loader.cancelled.connect(self._on_load_cancelled)
+
+        self._set_loading(True)
+        self.statusBar().showMessage(f"正在加载数据库：{os.path.basename(path)}")
+        self.loader_thread.start()
+
+    def cancel_loading(self):
+        """取消后台加载。"""
+        if self.loader:
+            self.loader.cancel()
+            self.statusBar().showMessage("正在取消加载...")
+
+    def _set_loading(self, loading: bool):
+        """切换加载状态的界面元素。"""
+        self.load_progress.setVisible(loading)
+        self.cancel_load_btn.setVisible(loading)
+        if loading:
+            self.load_progress.setRange(0, 0)
+        for button in (self.load_btn, self.save_btn, self.refresh_list_btn):
+            button.setEnabled(not loading)
+        self._update_edit_actions()
+        self.export_db_btn.setEnabled(not loading and not self.exporter)
+        self.import_logos_action.setEnabled(not loading)
+        self.bulk_edit_action.setEnabled(not loading)
+        self.rebalance_action.setEnabled(not loading)
+        self.export_table_action.setEnabled(not loading)
+        self.export_patch_action.setEnabled(not loading)
+        self.apply_patch_action.setEnabled(not loading)
+
+    def _finish_loading(self):
+        """结束后台加载线程。"""
+        if self.loader_thread:
+            self.loader_thread.quit()
+            self.loader_thread.wait()
+            self.loader_thread.deleteLater()
+        if self.loader:
+            self.loader.deleteLater()
+        self.loader = None
+        self.loader_thread = None
+        self._set_loading(False)
+
+    def closeEvent(self, event):
+        """关闭窗口前停止后台加载并关闭数据库连接。"""
+        if not self._confirm_discard_edits():
+            event.ignore()
+            return
+        if self.loader:
+            self.loader.cancel()
+            self.loader_thread.quit()
+            self.loader_thread.wait()
+        if self.exporter_thread:
+            # 等待导出完成，避免留下不完整的文件
+            self.exporter_thread.quit()
+            self.exporter_thread.wait()
+        if self.db:
+            self.db.close()
+        super().closeEvent(event)
+
+    def _on_leagues_loaded(self, leagues: Dict[int, str]):
+        """联赛信息已加载。"""
+        self.leagues = leagues
+
+    def _on_teams_loaded(self, chunk: List[TeamRecord]):
+        """收到一块球队数据。"""
+        for record in chunk:
+            self.team_by_id[record.id] = record
+        if self.displayed_team_records is not self.team_records:
+            # 加载期间已执行搜索，完成后再重新应用搜索条件
+            self.team_records.extend(chunk)
             return
 
-        try:
-            query = """
-                SELECT T.ID, T.TeamName, T.TeamWealth, T.TeamFoundYear,
-                       T.TeamLocation, T.SupporterCount, T.StadiumName, 
-                       T.Nickname, T.BelongingLeague
-                FROM Teams T
-                ORDER BY T.TeamName
-            """
-            self.cursor.execute(query)
-            raw_records = self.cursor.fetchall()
-
-            # Convert to TeamRecord objects
-            self.team_records = [TeamRecord(record) for record in raw_records]
-
-            # Apply search filter
-            self.apply_search_filter()
+        first_chunk = not self.team_records
+        self.team_model.append_records(chunk)
+        self.list_status_label.setText(f"共计: {len(self.team_records)} 个球队")
 
-            # Refresh list display
-            self.refresh_list()
+        # 第一块数据到达即选择第一个球队
+        if first_chunk and self.team_records:
+            self.team_list.setCurrentIndex(self.team_model.index(0))
 
-        except sqlite3.Error as e:
-            error_msg = f"刷新球队数据失败：{str(e)}"
-            logger.error(error_msg)
-            self.statusBar().showMessage(error_msg)
+    def _on_staff_loaded(self, chunk: List[StaffRecord]):
+        """收到一块员工数据。"""
+        self.staff_records.extend(chunk)
+        self._index_staff(chunk)
 
-    def refresh_staff_data(self):
-        """Refresh staff data."""
-        if not self.cursor:
-            return
+    def _on_load_progress(self, done: int, total: int):
+        """更新加载进度。"""
+        self.load_progress.setRange(0, max(total, 1))
+        self.load_progress.setValue(done)
 
-        try:
-            query = """
-                SELECT ID, Name, AbilityJSON, Fame, EmployedTeamID 
-                FROM Staff
-                ORDER BY Name
-            """
-            self.cursor.execute(query)
-            raw_records = self.cursor.fetchall()
+    def _on_load_finished(self, search_index: TeamSearchIndex):
+        """后台加载完成。"""
+        path = self.loader.path
+        self._finish_loading()
 
-            # Convert to StaffRecord objects
-            self.staff_records = [StaffRecord(record) for record in raw_records]
+        self.search_index = search_index
+        self.current_search = self.search_input.text().strip()
+        if self.current_search:
+            self.apply_search_filter()
+            self.refresh_list(select_first=False)
 
-            # If there is a currently selected team, update its staff display
-            if self.current_team_id:
-                self.update_staff(self.current_team_id)
+        # 员工数据已完整，刷新当前球队的员工
+        if self.current_team_id:
+            self.update_staff(self.current_team_id)
 
-        except sqlite3.Error as e:
-            error_msg = f"刷新员工数据失败：{str(e)}"
-            logger.error(error_msg)
-            self.statusBar().showMessage(error_msg)
+        # 更新状态
+        self.statusBar().showMessage(f"已加载数据库：{os.path.basename(path)}")
+        self.show_message(
+            "成功",
+            f"数据库加载成功！\n已加载 {len(self.team_records)} 个球队和 {len(self.staff_records)} 名员工。"
+        )
 
-    def on_select(self, item: QListWidgetItem):
-        """处理列表选择事件。"""
-        try:
-            idx = self.team_list.currentRow()
-            if idx < 0 or idx >= len(self.displayed_team_records):
-                return
+        logger.info(f"已加载数据库: {path}, 球队: {len(self.team_records)}, 员工: {len(self.staff_records)}")
+
+    def _on_load_failed(self, error_msg: str):
+        """后台加载失败。"""
+        self._finish_loading()
+        self.statusBar().showMessage(error_msg)
+        self.show_message("数据库错误", error_msg, QMessageBox.Critical)
+
+    def _on_load_cancelled(self):
+        """后台加载已取消，丢弃已读取的部分数据。"""
+        self._finish_loading()
+        if self.db:
+            self.db.close()
+            self.db = None
+        self.edit_session = None
+        self.team_model.staged = {}
+        self.staff_model.staged = {}
+        self._update_edit_actions()
+        self.team_records = []
+        self.team_by_id = {}
+        self.displayed_team_records = self.team_records
+        self.staff_records = []
+        self._index_staff()
+        self.current_team_id = None
+        self.selection_timer.stop()
+        self.refresh_list()
+        self.update_staff(None)
+        self.statusBar().showMessage("已取消加载数据库")
+        logger.info("已取消加载数据库")
+
+    def _index_staff(self, records: Optional[List[StaffRecord]] = None):
+        """按员工ID和所属球队ID建立员工索引。
+
+        不传 records 时重建整个索引，否则把新加载的一块员工加入索引。
+        """
+        if records is None:
+            self.staff_by_id = {}
+            self.staff_by_team = {}
+            records = self.staff_records
+        for staff in records:
+            self.staff_by_id[staff.id] = staff
+            self.staff_by_team.setdefault(staff.team_id, []).append(staff)
+
+    def on_select(self, current: QModelIndex, previous: QModelIndex = QModelIndex()):
+        """处理列表选择事件，快速连续的选择只处理最后一次。"""
+        if self._restoring_selection:
+            return
+        self._pending_selection = QPersistentModelIndex(current)
+        self.selection_timer.start()
+
+    def _apply_selection(self):
+        """显示最后选中的球队。"""
+        index = self._pending_selection
+        self._pending_selection = QPersistentModelIndex()
+        if not index.isValid():
+            return
 
+        try:
             # 获取选中的球队记录
-            record = self.displayed_team_records[idx]
+            row = index.row()
+            record = self.team_model.record(row)
+            if record is None:
+                return
             self.current_team_id = record.id
 
-            # 更新Logo显示
+            # 取消已过时的标志解码，更新Logo显示，并预取相邻球队的标志
+            neighbour_paths = self._neighbour_logo_paths(row)
+            self.logo_cache.cancel_queued(keep=[self._logo_path(record.id)] + neighbour_paths)
             self.update_logo(self.current_team_id)
+            self.logo_cache.prefetch(neighbour_paths)
 
             # 显示球队数据
             self._display_team_data(record)
@@ -1505,22 +2346,16 @@ class TeamDatabaseViewer(QMainWindow):
     def _display_team_data(self, record: TeamRecord):
         """显示球队数据。"""
         try:
-            # 如果有临时数据，优先使用
-            if self.current_team_id in self.temp_data:
-                data = self.temp_data[self.current_team_id]
-                for field in self.fields:
-                    if field == "BelongingLeague":
-                        continue
-                    entry = self.entries[field]
-                    entry.setText(str(data.get(field, "")))
-            else:
-                # 从数据库加载数据
-                record_dict = record.to_dict()
-                for field in self.fields:
-                    if field == "BelongingLeague":
-                        continue
-                    entry = self.entries[field]
-                    entry.setText(str(record_dict.get(field, "")))
+            # 有暂存修改时优先显示暂存的值
+            record_dict = record.to_dict()
+            staged = self.edit_session.staged("Teams", record.id) if self.edit_session else None
+            if staged:
+                record_dict.update(staged)
+            for field in self.fields:
+                if field == "BelongingLeague":
+                    continue
+                entry = self.entries[field]
+                entry.setText(str(record_dict.get(field, "")))
 
             # 设置联赛名称
             league_name = self.leagues.get(record.league_id, "未知联赛")
@@ -1536,6 +2371,10 @@ class TeamDatabaseViewer(QMainWindow):
             logger.error(f"显示球队数据时出错: {e}", exc_info=True)
             self.statusBar().showMessage(f"显示球队数据失败: {str(e)}")
             
+    def _logo_path(self, team_id) -> str:
+        """返回球队标志文件路径。"""
+        return os.path.join(self.db_directory, f"L{team_id}.png")
+
     def update_logo(self, team_id):
         """更新球队标志显示。"""
         # 清除现有标志
@@ -1546,57 +2385,240 @@ class TeamDatabaseViewer(QMainWindow):
         if not team_id:
             return
 
-        # 构建标志文件路径
-        logo_path = os.path.join(self.db_directory, f"L{team_id}.png")
-
-        # 检查文件是否存在
-        if os.path.exists(logo_path):
-            try:
-                # 创建圆形Logo
-                original = QImage(logo_path)
-                # 将图像调整为正方形
-                size = min(LOGO_SIZE)
-                image = original.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                
-                # 显示图像
-                pixmap = QPixmap.fromImage(image)
-                self.logo_label.setPixmap(pixmap)
-                self.logo_label.setStyleSheet(f"""
-                    background-color: {COLORS['card']};
-                    border: 2px solid {COLORS['primary']};
-                    border-radius: {size//2}px;
-                    padding: 0px;
-                    min-width: {size}px;
-                    min-height: {size}px;
-                    max-width: {size}px;
-                    max-height: {size}px;
-                """)
-                
-                # 更新提示文本
-                self.logo_hint.setText("点击可更改Logo")
-                self.logo_hint.setStyleSheet(f"color: {COLORS['light_text']}; font-size: 11px;")
-                
-            except Exception as e:
-                logger.error(f"加载Logo失败: {str(e)}")
-                self.logo_label.setText("Logo加载失败")
-                self.logo_label.setStyleSheet(f"""
-                    background-color: {COLORS['card']};
-                    border: 2px dashed {COLORS['border']};
-                    border-radius: 75px;
-                    color: {COLORS['light_text']};
-                    font-style: italic;
-                """)
+        # 已缓存的标志直接显示，否则在后台解码
+        logo_path = self._logo_path(team_id)
+        found, pixmap = self.logo_cache.lookup(logo_path)
+        if found:
+            self._show_logo(pixmap)
         else:
+            self._show_logo_placeholder("Logo加载中...")
+            self.logo_cache.load(logo_path)
+
+    def _neighbour_logo_paths(self, row: int) -> List[str]:
+        """返回列表中相邻球队的标志路径，由近及远。"""
+        paths = []
+        for distance in range(1, self.logo_prefetch_depth + 1):
+            for neighbour in (row + distance, row - distance):
+                record = self.team_model.record(neighbour)
+                if record is not None:
+                    paths.append(self._logo_path(record.id))
+        return paths
+
+    def _on_logo_loaded(self, path: str, pixmap: Optional[QPixmap]):
+        """后台解码完成，如果仍是当前球队则显示。"""
+        if self.current_team_id and path == self._logo_path(self.current_team_id):
+            self._show_logo(pixmap)
+
+    def _on_logo_failed(self, path: str):
+        """后台解码失败。"""
+        if self.current_team_id and path == self._logo_path(self.current_team_id):
+            self._show_logo_placeholder("Logo加载失败")
+
+    def _show_logo(self, pixmap: Optional[QPixmap]):
+        """显示标志图像，pixmap 为 None 表示标志文件不存在。"""
+        if pixmap is None:
             # 如果Logo不存在则显示默认文本
-            self.logo_label.setText("无Logo\n点击添加")
-            self.logo_label.setStyleSheet(f"""
-                background-color: {COLORS['card']};
-                border: 2px dashed {COLORS['border']};
-                border-radius: 75px;
-                color: {COLORS['light_text']};
-                font-style: italic;
-            """)
-            
+            self._show_logo_placeholder("无Logo\n点击添加")
+            return
+
+        size = min(LOGO_SIZE)
+        self.logo_label.setPixmap(pixmap)
+        self.logo_label.setStyleSheet(f"""
+            background-color: {COLORS['card']};
+            border: 2px solid {COLORS['primary']};
+            border-radius: {size//2}px;
+            padding: 0px;
+            min-width: {size}px;
+            min-height: {size}px;
+            max-width: {size}px;
+            max-height: {size}px;
+        """)
+
+        # 更新提示文本
+        self.logo_hint.setText("点击可更改Logo")
+        self.logo_hint.setStyleSheet(f"color: {COLORS['light_text']}; font-size: 11px;")
+
+    def _show_logo_placeholder(self, text: str):
+        """在标志区域显示提示文本。"""
+        self.logo_label.clear()
+        self.logo_label.setText(text)
+        self.logo_label.setStyleSheet(f"""
+            background-color: {COLORS['card']};
+            border: 2px dashed {COLORS['border']};
+            border-radius: 75px;
+            color: {COLORS['light_text']};
+            font-style: italic;
+        """)
+
+    def import_logo_folder(self):
+        """从文件夹批量导入Logo，文件名为球队ID或球队名称。"""
+        from PySide6.QtWidgets import QProgressDialog
+        from logo_import import import_logos, plan_logo_import
+
+        if not self.db or not self.team_records:
+            self.show_message("警告", "请先加载数据库", QMessageBox.Warning)
+            return
+
+        folder = QFileDialog.getExistingDirectory(
+            self, "选择Logo文件夹", self.db_directory or os.path.expanduser("~")
+        )
+        if not folder:
+            return
+
+        try:
+            plan = plan_logo_import(folder, self.team_records)
+        except OSError as e:
+            self.show_message("错误", f"读取文件夹失败：{str(e)}", QMessageBox.Critical)
+            return
+
+        if not plan.matches:
+            self.show_message("提示", "文件夹中没有可匹配到球队的图片", QMessageBox.Warning)
+            return
+
+        # 先显示匹配结果，确认后再写入
+        confirm = QMessageBox(self)
+        confirm.setWindowTitle("批量导入Logo")
+        confirm.setIcon(QMessageBox.Question)
+        confirm.setText(
+            f"匹配到 {len(plan.matches)} 个球队的Logo，{len(plan.unmatched)} 个文件未匹配。\n"
+            f"已有的Logo将被覆盖，是否继续？"
+        )
+        if plan.unmatched:
+            confirm.setDetailedText(plan.report())
+        confirm.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
+        if confirm.exec() != QMessageBox.Yes:
+            return
+
+        progress_dialog = QProgressDialog("正在导入Logo...", "取消", 0, len(plan.matches), self)
+        progress_dialog.setWindowTitle("批量导入Logo")
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(0)
+
+        def on_progress(done: int, total: int) -> bool:
+            progress_dialog.setValue(done)
+            QApplication.processEvents()
+            return not progress_dialog.wasCanceled()
+
+        try:
+            imported, failed = import_logos(plan, self.db_directory, min(LOGO_SIZE), on_progress)
+        except Exception as e:
+            error_msg = f"批量导入Logo失败：{str(e)}"
+            logger.error(error_msg, exc_info=True)
+            self.show_message("错误", error_msg, QMessageBox.Critical)
+            return
+        finally:
+            progress_dialog.close()
+
+        for team_id in imported:
+            self.logo_cache.invalidate(self._logo_path(team_id))
+        self.update_logo(self.current_team_id)
+
+        message = f"已导入 {len(imported)} 个Logo。"
+        if failed:
+            message += f"\n{len(failed)} 个文件导入失败：\n" + "\n".join(
+                f"{name}: {error}" for name, error in failed[:20]
+            )
+        self.show_message("完成", message, QMessageBox.Warning if failed else QMessageBox.Information)
+        logger.info(f"批量导入Logo: 成功 {len(imported)}, 失败 {len(failed)}, 未匹配 {len(plan.unmatched)}")
+
+    def bulk_edit_teams(self):
+        """用公式批量修改当前列表中全部球队的数值字段。"""
+        if not self.db or not self.displayed_team_records:
+            self.show_message("警告", "当前列表中没有球队", QMessageBox.Warning)
+            return
+
+        records = list(self.displayed_team_records)
+        staged = [record for record in records if self.edit_session.staged("Teams", record.id)]
+        if staged:
+            # 暂存的修改提交时会覆盖批量修改的结果
+            self.show_message(
+                "警告",
+                f"列表中有 {len(staged)} 个球队存在暂存的修改，请先提交或放弃这些修改",
+                QMessageBox.Warning
+            )
+            return
+
+        dialog = BulkTeamEditDialog(self, records, self.field_labels)
+        if dialog.exec() != QDialog.Accepted or not dialog.edit:
+            return
+
+        if not self.show_confirm(
+            "确认批量修改", f"您确定要修改 {len(dialog.changes)} 个球队吗？此操作会立即写入数据库。"
+        ):
+            return
+
+        assignments, params = dialog.edit.assignments_sql()
+        try:
+            changes = self.db.bulk_update_teams(
+                [record.id for record in records], dialog.edit.fields, assignments, params
+            )
+        except (sqlite3.Error, ValueError) as e:
+            error_msg = f"批量修改失败，数据库未修改：{str(e)}"
+            logger.error(error_msg)
+            self.show_message("数据库错误", error_msg, QMessageBox.Critical)
+            return
+
+        self._reload_rows(("Teams", change.row_id) for change in changes)
+        self.statusBar().showMessage(f"已批量修改 {len(changes)} 个球队")
+        logger.info(f"批量修改球队: {assignments} {params}, {len(changes)} 个球队")
+
+    def rebalance_staff(self):
+        """对数据库中全部员工的能力值或知名度进行批量重新平衡。"""
+        if not self.db:
+            self.show_message("警告", "请先加载数据库", QMessageBox.Warning)
+            return
+        if self.edit_session.edits["Staff"]:
+            # 暂存的修改提交时会覆盖重新平衡的结果
+            self.show_message("警告", "存在暂存的员工修改，请先提交或放弃这些修改", QMessageBox.Warning)
+            return
+
+        from PySide6.QtWidgets import QProgressDialog
+        from staff_rebalance import REBALANCE_FIELDS, RebalanceError, StaffArrays, require_numpy
+
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            require_numpy()
+            arrays = StaffArrays.load(self.db.conn)
+        except (RebalanceError, sqlite3.Error) as e:
+            self.show_message("错误", str(e), QMessageBox.Critical)
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        dialog = StaffRebalanceDialog(self, arrays)
+        if dialog.exec() != QDialog.Accepted or not dialog.rebalance:
+            return
+
+        rebalance, rows = dialog.rebalance, dialog.rows
+        if not self.show_confirm(
+            "确认重新平衡", f"您确定要修改 {len(rows)} 个员工的{REBALANCE_FIELDS[rebalance.field]}吗？"
+        ):
+            return
+
+        progress_dialog = QProgressDialog("正在写入...", None, 0, len(rows), self)
+        progress_dialog.setWindowTitle("员工重新平衡")
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(0)
+
+        def on_progress(done: int, total: int):
+            progress_dialog.setValue(done)
+            QApplication.processEvents()
+
+        try:
+            changes = self.db.update_staff_values(rebalance.field, rows, progress=on_progress)
+        except (sqlite3.Error, ValueError) as e:
+            error_msg = f"重新平衡失败，数据库未修改：{str(e)}"
+            logger.error(error_msg)
+            self.show_message("数据库错误", error_msg, QMessageBox.Critical)
+            return
+        finally:
+            progress_dialog.close()
+
+        logger.info(f"员工重新平衡: {rebalance.describe()}, {len(changes)} 个员工")
+        self.statusBar().showMessage(f"已修改 {len(changes)} 个员工")
+        # 修改的行可能很多，直接在后台重新加载列表
+        self._refresh_lists()
+
     def on_logo_click(self, event):
         """处理Logo点击事件。"""
         if not self.current_team_id:
@@ -1633,8 +2655,9 @@ class TeamDatabaseViewer(QMainWindow):
             )
 
             # 保存为PNG
-            logo_path = os.path.join(self.db_directory, f"L{team_id}.png")
+            logo_path = self._logo_path(team_id)
             image.save(logo_path, "PNG")
+            self.logo_cache.invalidate(logo_path)
 
             # 更新显示
             self.update_logo(team_id)
@@ -1651,13 +2674,35 @@ class TeamDatabaseViewer(QMainWindow):
 
     def search(self):
         """执行搜索操作。"""
-        self.current_search = self.search_input.text().strip()
-        self.apply_search_filter()
-        self.refresh_list()
+        self.search_timer.stop()
+        self._apply_search(self.search_input.text().strip(), live=False)
+
+    def _live_search(self):
+        """输入停止后执行的实时搜索，不自动选择第一个球队。"""
+        term = self.search_input.text().strip()
+        if term == self.current_search:
+            return
+        self._apply_search(term, live=True)
+
+    def _apply_search(self, term: str, live: bool):
+        """应用搜索词并更新列表和状态。"""
+        previous_search = self.current_search
+        self.current_search = term
+
+        # 新搜索词包含上一次的普通搜索词时，只需在上一次的结果中筛选
+        within = None
+        if (previous_search and not self.search_is_structured
+                and normalize_search_text(previous_search) in normalize_search_text(term)):
+            within = self.displayed_team_records
+
+        self.apply_search_filter(within)
+        self.refresh_list(select_first=not live)
 
         # 更新状态
         results_count = len(self.displayed_team_records)
-        if self.current_search:
+        if self.search_error:
+            self.statusBar().showMessage(f"查询语法错误: {self.search_error}")
+        elif self.current_search:
             if results_count > 0:
                 self.statusBar().showMessage(f"搜索 '{self.current_search}' 找到 {results_count} 个匹配项")
             else:
@@ -1683,6 +2728,7 @@ class TeamDatabaseViewer(QMainWindow):
     def _clear_search(self):
         """清除搜索并显示所有球队。"""
         self.search_input.clear()
+        self.search_timer.stop()
         self.current_search = ""
         self.apply_search_filter()
         self.refresh_list()
@@ -1696,16 +2742,29 @@ class TeamDatabaseViewer(QMainWindow):
         
         self.statusBar().showMessage("显示全部球队")
         
-    def apply_search_filter(self):
-        """对球队记录应用搜索过滤。"""
+    def apply_search_filter(self, within: Optional[List[TeamRecord]] = None):
+        """对球队记录应用搜索过滤，within 为可供缩小范围的上一次结果。
+
+        搜索词中包含字段条件（如 league:3 wealth>5000）时按字段查询，否则按子串搜索。
+        """
+        self.search_is_structured = False
+        self.search_error = ""
         if not self.current_search:
             self.displayed_team_records = self.team_records
+            return
+
+        try:
+            query = parse_team_query(self.current_search)
+        except QuerySyntaxError as e:
+            self.search_error = str(e)
+            self.displayed_team_records = []
+            return
+
+        if query.is_structured:
+            self.search_is_structured = True
+            self.displayed_team_records = self.search_index.query(query)
         else:
-            search_term = self.current_search.lower()
-            self.displayed_team_records = [
-                record for record in self.team_records
-                if search_term in record.as_search_string().lower()
-            ]
+            self.displayed_team_records = self.search_index.search(self.current_search, within)
             
     def show_message(self, title, message, icon=QMessageBox.Information):
         """显示统一样式的消息框。"""
@@ -1790,8 +2849,8 @@ class TeamDatabaseViewer(QMainWindow):
         return msg_box.exec_() == QMessageBox.Yes
         
     def save_team_changes(self):
-        """保存球队信息修改。"""
-        if not self.conn:
+        """暂存球队信息修改（提交修改时统一写入数据库）。"""
+        if not self.db:
             self.show_message("警告", "请先加载数据库", QMessageBox.Warning)
             return
 
@@ -1802,7 +2861,7 @@ class TeamDatabaseViewer(QMainWindow):
         try:
             # 收集输入数据
             data = {}
-            numeric_fields = ["TeamWealth", "SupporterCount", "TeamFoundYear"]
+            numeric_fields = TEAM_NUMERIC_FIELDS
 
             # 验证并收集数据
             for field in self.fields:
@@ -1827,47 +2886,21 @@ class TeamDatabaseViewer(QMainWindow):
                 else:
                     data[field] = value
 
-            # 确认保存
-            if not self.show_confirm("确认保存", "您确定要保存对球队数据的修改吗？"):
-                return
-
-            # 构建更新SQL
-            update_fields = [f for f in self.fields if f != "ID" and f != "BelongingLeague"]
-
-            query = f"""
-                UPDATE Teams SET
-                    {','.join([f"{field}=?" for field in update_fields])}
-                WHERE ID = ?
-            """
-
-            # 执行更新
-            self.cursor.execute(
-                query,
-                [data[field] for field in update_fields] + [self.current_team_id]
-            )
-
-            self.conn.commit()
-
-            # 清除临时数据
-            if self.current_team_id in self.temp_data:
-                self.temp_data.pop(self.current_team_id)
-
-            # 刷新数据
-            self.refresh_team_data()
+            # 暂存修改，提交前只在界面中标记；与数据库中相同时取消暂存
+            record = self.team_by_id.get(self.current_team_id)
+            record_dict = record.to_dict() if record else {}
+            if all(record_dict.get(field) == value for field, value in data.items()):
+                self.edit_session.discard("Teams", self.current_team_id)
+            else:
+                self.edit_session.stage_team(self.current_team_id, data)
 
-            # 重新选择当前球队
-            self.select_current_team()
+            if record:
+                self.team_model.refresh_record(record)
+                self._display_team_data(record)
+            self._update_edit_actions()
 
             # 更新状态
-            self.statusBar().showMessage(f"已保存球队 {data['TeamName']} 的修改")
-            self.show_message("成功", "球队数据已保存")
-
-            logger.info(f"保存了球队 {self.current_team_id} 的修改")
-
-        except sqlite3.Error as e:
-            error_msg = f"数据库错误：{str(e)}"
-            logger.error(error_msg)
-            self.show_message("数据库错误", error_msg, QMessageBox.Critical)
+            self.statusBar().showMessage(f"已暂存球队 {data['TeamName']} 的修改，共 {len(self.edit_session)} 条待提交")
 
         except Exception as e:
             error_msg = f"保存失败：{str(e)}"
@@ -1885,295 +2918,424 @@ class TeamDatabaseViewer(QMainWindow):
             self.show_message("输入错误", f"{field_name} 必须是有效的数字", QMessageBox.Critical)
             raise ValueError(f"Invalid number: {value}")
 
-    def refresh_list(self):
-        """刷新球队列表显示。"""
-        self.team_list.clear()
+    def refresh_list(self, select_first: bool = True):
+        """刷新球队列表显示。
+
+        select_first 为 False 时不自动加载第一个球队，只在列表中保留当前球队的选中状态。
+        """
+        self.team_model.set_records(self.displayed_team_records)
 
         # 更新计数显示
         total = len(self.displayed_team_records)
         self.list_status_label.setText(f"共计: {total} 个球队")
-        
-        if total == 0:
-            # 如果没有记录，显示提示信息
-            empty_item = QListWidgetItem("没有找到球队记录")
-            empty_item.setFlags(Qt.NoItemFlags)
-            empty_item.setTextAlignment(Qt.AlignCenter)
-            self.team_list.addItem(empty_item)
-            return
 
-        # 添加项目到列表
-        for i, record in enumerate(self.displayed_team_records):
-            item = QListWidgetItem()
-            
-            # 设置项目文本和提示
-            name_text = record.name
-            if record.nickname:
-                name_text += f" ({record.nickname})"
-                
-            item.setText(name_text)
-            item.setToolTip(f"ID: {record.id}\n地区: {record.location}\n成立年份: {record.found_year}")
-            
-            # 设置交替行颜色
-            if i % 2 == 0:
-                item.setBackground(QColor(COLORS['background']))
-                
-            self.team_list.addItem(item)
-
-        # 如果有项目则选择第一项
-        if self.team_list.count() > 0:
-            self.team_list.setCurrentRow(0)
-            self.on_select(self.team_list.item(0))
-            
-    def select_current_team(self):
-        """在列表中重新选择当前球队。"""
-        if not self.current_team_id:
+        if select_first:
+            # 如果有项目则选择第一项
+            if total > 0:
+                self.team_list.setCurrentIndex(self.team_model.index(0))
             return
 
-        # 在显示列表中查找球队
-        for i, record in enumerate(self.displayed_team_records):
-            if record.id == self.current_team_id:
-                self.team_list.setCurrentRow(i)
-                self.on_select(self.team_list.item(i))
-                return
-                
-        # 如果未找到当前球队（可能由于过滤），显示提示
-        self.statusBar().showMessage(f"当前选择的球队不在筛选结果中")
-        
+        record = self.team_by_id.get(self.current_team_id)
+        row = self.team_model.row_of(record) if record else -1
+        if row >= 0:
+            index = self.team_model.index(row)
+            self._restoring_selection = True
+            try:
+                self.team_list.setCurrentIndex(index)
+            finally:
+                self._restoring_selection = False
+            self.team_list.scrollTo(index)
+
     def update_staff(self, team_id):
         """更新所选球队的员工信息。"""
-        self.staff_tree.clear()
-
         if not team_id:
+            self.staff_model.set_records([], show_empty_hint=False)
             return
 
-        # 筛选此球队的员工
-        team_staff = [s for s in self.staff_records if s.team_id == team_id]
-        
-        if not team_staff:
-            # 如果没有员工，显示提示项
-            empty_item = QTreeWidgetItem(self.staff_tree)
-            empty_item.setText(0, "")
-            empty_item.setText(1, "该球队暂无员工记录")
-            empty_item.setTextAlignment(1, Qt.AlignCenter)
-            empty_item.setFlags(Qt.NoItemFlags)
-            return
-
-        # 按能力值排序（降序）
-        team_staff.sort(key=lambda s: s.get_ability(), reverse=True)
-
-        # 添加到树形视图
-        for staff in team_staff:
-            item = QTreeWidgetItem(self.staff_tree)
-            item.setText(0, str(staff.id))
-            item.setText(1, staff.name)
-            
-            ability = staff.get_ability()
-            item.setText(2, str(ability))
-            
-            # 根据能力值设置颜色
-            if ability >= 80:
-                item.setForeground(2, QColor(COLORS['success']))
-            elif ability >= 60:
-                item.setForeground(2, QColor(COLORS['primary']))
-                
-            item.setText(3, str(staff.fame))
-            item.setData(0, Qt.UserRole, staff)
-
-        self.staff_tree.resizeColumnToContents(1)
-
-    def edit_staff(self, item, column):
+        # 按能力值降序提供数据，使首批行即为默认排序下的前几行
+        team_staff = sorted(
+            self.staff_by_team.get(team_id, ()),
+            key=lambda s: s.ability,
+            reverse=True
+        )
+        self.staff_model.set_records(team_staff)
+        self._ensure_staff_sort_complete()
+
+    def _on_staff_sort_changed(self, column, order):
+        """用户点击表头排序时处理。"""
+        self._ensure_staff_sort_complete()
+
+    def _ensure_staff_sort_complete(self):
+        """非默认排序时需要全部行参与排序。"""
+        header = self.staff_tree.header()
+        default_sort = (StaffTableModel.ABILITY_COLUMN, Qt.DescendingOrder)
+        if (header.sortIndicatorSection(), header.sortIndicatorOrder()) != default_sort:
+            self.staff_model.fetch_all()
+
+    def _refresh_staff_row(self, staff: StaffRecord):
+        """仅更新员工表格中显示该员工的行。"""
+        if staff.team_id == self.current_team_id:
+            self.staff_model.refresh_record(staff)
+
+    def edit_staff(self, index: QModelIndex):
         """编辑员工信息。"""
-        if not self.conn:
+        if not self.db:
             self.show_message("警告", "请先加载数据库", QMessageBox.Warning)
             return
 
         # 获取员工记录
-        staff = item.data(0, Qt.UserRole)
+        staff = index.data(StaffTableModel.RECORD_ROLE)
         if not staff:
             return
 
         # 打开编辑对话框
-        dialog = StaffEditDialog(self, staff, self.update_staff_record)
+        dialog = StaffEditDialog(
+            self, staff, self.update_staff_record,
+            staged=self.edit_session.staged("Staff", staff.id) if self.edit_session else None
+        )
         dialog.exec_()
 
     def update_staff_record(self, staff_id, name, ability, fame):
-        """在数据库中更新员工记录。"""
+        """暂存员工记录的修改（提交修改时统一写入数据库）。"""
         try:
             # 查找员工记录
-            staff = next((s for s in self.staff_records if s.id == staff_id), None)
+            staff = self.staff_by_id.get(staff_id)
             if not staff:
                 raise ValueError(f"找不到ID为 {staff_id} 的员工")
 
-            # 更新能力值JSON
-            ability_json = staff.update_ability(ability)
+            # 暂存修改，与数据库中相同时取消暂存
+            if (name, ability, fame) == (staff.name, staff.ability, staff.fame):
+                self.edit_session.discard("Staff", staff_id)
+            else:
+                self.edit_session.stage_staff(staff, name, ability, fame)
+
+            # 仅更新该员工所在行
+            self._refresh_staff_row(staff)
+            self._update_edit_actions()
+
+            self.statusBar().showMessage(f"已暂存员工 {name} 的修改，共 {len(self.edit_session)} 条待提交")
+
+        except Exception as e:
+            error_msg = f"更新员工失败：{str(e)}"
+            logger.error(error_msg, exc_info=True)
+            self.show_message("错误", error_msg, QMessageBox.Critical)
+
+    def _update_edit_actions(self):
+        """根据暂存修改的数量更新提交和放弃按钮。"""
+        count = len(self.edit_session) if self.edit_session else 0
+        self.commit_btn.setText(f"提交修改 ({count})" if count else "提交修改")
+        self.commit_btn.setEnabled(bool(count) and not self.loader)
+        self.discard_btn.setEnabled(bool(count) and not self.loader)
+
+    def commit_edits(self):
+        """在一个事务中提交全部暂存修改。"""
+        if not self.edit_session or not len(self.edit_session):
+            return
 
-            # 更新数据库
-            self.cursor.execute(
-                "UPDATE Staff SET Name = ?, AbilityJSON = ?, Fame = ? WHERE ID = ?",
-                (name, ability_json, fame, staff_id)
+        count = len(self.edit_session)
+        if not self.show_confirm("确认提交", f"您确定要把 {count} 条暂存的修改写入数据库吗？"):
+            return
+
+        try:
+            result = self.edit_session.commit()
+        except (sqlite3.Error, ValueError) as e:
+            error_msg = f"提交失败，数据库未修改：{str(e)}"
+            logger.error(error_msg)
+            self.show_message("数据库错误", error_msg, QMessageBox.Critical)
+            return
+
+        self._reload_rows(
+            (table, row_id) for table, row_ids in result.committed.items() for row_id in row_ids
+        )
+        self._update_edit_actions()
+
+        committed = sum(len(row_ids) for row_ids in result.committed.values())
+        logger.info(f"已提交 {committed} 条修改")
+        if result.failures:
+            self.show_message(
+                "部分提交失败",
+                f"已提交 {committed} 条修改，以下表的修改已回滚并保留为暂存状态：\n"
+                + "\n".join(f"{table}: {error}" for table, error in result.failures.items()),
+                QMessageBox.Warning
             )
-            self.conn.commit()
+        else:
+            self.statusBar().showMessage(f"已提交 {committed} 条修改")
+            self.show_message("成功", f"已提交 {committed} 条修改")
+
+    def discard_edits(self):
+        """放弃全部暂存修改。"""
+        if not self.edit_session or not len(self.edit_session):
+            return
+        if not self.show_confirm("放弃修改", f"您确定要放弃 {len(self.edit_session)} 条暂存的修改吗？"):
+            return
+
+        rows = [(table, row_id) for table, staged in self.edit_session.edits.items() for row_id in staged]
+        self.edit_session.discard()
+        self._reload_rows(rows, from_database=False)
+        self._update_edit_actions()
+        self.statusBar().showMessage("已放弃暂存的修改")
+
+    def _confirm_discard_edits(self) -> bool:
+        """有未提交的修改时询问是否放弃，返回是否可以继续。"""
+        if not self.edit_session or not len(self.edit_session):
+            return True
+        return self.show_confirm(
+            "未提交的修改",
+            f"有 {len(self.edit_session)} 条修改尚未提交，继续将放弃这些修改。是否继续？"
+        )
+
+    def export_patch(self):
+        """把本次会话的修改导出为补丁文件。"""
+        if not self.db:
+            self.show_message("警告", "请先加载数据库", QMessageBox.Warning)
+            return
+
+        if not self.db.changes:
+            self.show_message("提示", "本次会话还没有提交过修改", QMessageBox.Warning)
+            return
+
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "导出修改补丁",
+            os.path.join(
+                self.db_directory or os.path.expanduser("~"),
+                f"CFS_Patch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            ),
+            "CFS补丁 (*.json);;所有文件 (*.*)"
+        )
+        if not file_path:
+            return
 
-            # 刷新员工数据
-            self.refresh_staff_data()
+        try:
+            count = self.db.export_patch(file_path)
+            self.show_message("成功", f"已导出 {count} 条记录的修改到:\n{file_path}")
+        except OSError as e:
+            error_msg = f"导出补丁失败：{str(e)}"
+            logger.error(error_msg)
+            self.show_message("错误", error_msg, QMessageBox.Critical)
 
-            self.statusBar().showMessage(f"已更新员工: {name}")
-            logger.info(f"已更新员工 {staff_id}: {name}")
+    def apply_patch(self):
+        """把补丁文件应用到当前数据库（一个事务），并报告冲突。"""
+        if not self.db:
+            self.show_message("警告", "请先加载数据库", QMessageBox.Warning)
+            return
 
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "选择修改补丁",
+            self.db_directory or os.path.expanduser("~"),
+            "CFS补丁 (*.json);;所有文件 (*.*)"
+        )
+        if not file_path:
+            return
+
+        try:
+            result = self.db.apply_patch(file_path)
+        except (PatchError, OSError) as e:
+            self.show_message("错误", f"补丁无效：{str(e)}", QMessageBox.Critical)
+            return
         except sqlite3.Error as e:
-            error_msg = f"数据库错误：{str(e)}"
+            error_msg = f"应用补丁失败，数据库未修改：{str(e)}"
             logger.error(error_msg)
             self.show_message("数据库错误", error_msg, QMessageBox.Critical)
+            return
 
-        except Exception as e:
-            error_msg = f"更新员工失败：{str(e)}"
-            logger.error(error_msg, exc_info=True)
-            self.show_message("错误", error_msg, QMessageBox.Critical)
+        self._reload_rows((change.table, change.row_id) for change in result.applied)
+
+        msg_box = QMessageBox(self)
+        msg_box.setWindowTitle("应用补丁")
+        msg_box.setIcon(QMessageBox.Warning if result.conflicts else QMessageBox.Information)
+        text = f"已应用 {len(result.applied)} 条修改，{len(result.conflicts)} 条因冲突被跳过。"
+        if result.skipped:
+            text += f"\n{len(result.skipped)} 条修改在当前数据库中已是新值，未重复写入。"
+        msg_box.setText(text)
+        if result.conflicts:
+            msg_box.setDetailedText(result.report())
+        msg_box.exec()
+
+    def _reload_rows(self, rows: Iterable[Tuple[str, int]], from_database: bool = True):
+        """刷新指定的球队和员工行，from_database 为 True 时先重新读取记录。
+
+        每个表的记录用一次查询重新读取，球队列表只发出一次 dataChanged。
+        """
+        teams, staff_members = [], []
+        for table, row_id in rows:
+            if table == "Teams" and row_id in self.team_by_id:
+                teams.append(self.team_by_id[row_id])
+            elif table == "Staff" and row_id in self.staff_by_id:
+                staff_members.append(self.staff_by_id[row_id])
+        if from_database:
+            teams = self.db.reload_teams(teams)
+            staff_members = self.db.reload_staff_records(staff_members)
+
+        for record in teams:
+            self.search_index.update(record)
+        self.team_model.refresh_records(teams)
+        for staff in staff_members:
+            self._refresh_staff_row(staff)
+
+        record = self.team_by_id.get(self.current_team_id)
+        if record:
+            self._display_team_data(record)
 
     def _refresh_lists(self):
         """Refresh lists data."""
-        self.refresh_team_data()
-        self.refresh_staff_data()
-        self.statusBar().showMessage("列表已刷新")
-
-    def _export_team_list(self):
-        """导出球队列表到CSV文件。"""
-        if not self.team_records:
-            self.show_message("警告", "没有可导出的数据", QMessageBox.Warning)
+        if not self.db or self.loader:
             return
+        self._start_loading(self.db.path)
 
-        try:
-            # 选择保存文件
-            file_path, _ = QFileDialog.getSaveFileName(
-                self,
-                "导出球队列表",
-                os.path.join(self.db_directory or os.path.expanduser("~"), "team_list.csv"),
-                "CSV文件 (*.csv);;所有文件 (*.*)"
-            )
+    def _choose_export_path(self, title: str, default_name: str) -> str:
+        """选择导出文件，格式由扩展名决定。"""
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            title,
+            os.path.join(self.db_directory or os.path.expanduser("~"), default_name),
+            ";;".join(name for name, _ in EXPORT_FILE_FILTERS)
+        )
+        if not file_path:
+            return ""
 
-            if not file_path:
-                return
+        extensions = [ext for _, ext in EXPORT_FILE_FILTERS]
+        if not any(file_path.lower().endswith(ext) for ext in extensions):
+            file_path += dict(EXPORT_FILE_FILTERS).get(selected_filter, ".csv")
+        return file_path
 
-            # 写入CSV
-            with open(file_path, 'w', encoding='utf-8') as f:
-                header = ','.join([self.field_labels.get(field, field) for field in self.fields])
-                f.write(f"{header}\n")
+    def _export_source(self, source: str, file_path: str, labels: Optional[Dict[str, str]] = None):
+        """从数据库流式导出数据并提示结果。"""
+        from cfs_export import EXPORT_SOURCES, export_table
 
-                for team in self.team_records:
-                    data = team.to_dict()
-                    row = ','.join([str(data.get(field, '')) for field in self.fields])
-                    f.write(f"{row}\n")
+        try:
+            self.statusBar().showMessage(f"正在导出{EXPORT_SOURCES[source].title}...")
+            rows = export_table(
+                self.db.conn, source, file_path, labels=labels,
+                progress=lambda done: self.statusBar().showMessage(
+                    f"正在导出{EXPORT_SOURCES[source].title}: {done} 行"
+                )
+            )
 
+            self.statusBar().showMessage(f"已导出 {rows} 行")
             self.show_message(
                 "成功",
-                f"已导出 {len(self.team_records)} 个球队数据至文件:\n{file_path}"
+                f"已导出 {rows} 行{EXPORT_SOURCES[source].title}数据至文件:\n{file_path}"
             )
 
-            logger.info(f"已导出球队列表到: {file_path}")
-
         except Exception as e:
             error_msg = f"导出失败：{str(e)}"
             logger.error(error_msg, exc_info=True)
             self.show_message("错误", error_msg, QMessageBox.Critical)
 
+    def _export_team_list(self):
+        """导出球队列表（CSV、TSV或JSON Lines）。"""
+        if not self.db or not self.team_records:
+            self.show_message("警告", "没有可导出的数据", QMessageBox.Warning)
+            return
+
+        file_path = self._choose_export_path("导出球队列表", "team_list.csv")
+        if file_path:
+            self._export_source("teams", file_path, labels=self.field_labels)
+
+    def _export_table(self):
+        """选择数据表（球队、员工、联赛或关联表）并导出。"""
+        from PySide6.QtWidgets import QInputDialog
+        from cfs_export import EXPORT_SOURCES
+
+        if not self.db:
+            self.show_message("警告", "请先加载数据库", QMessageBox.Warning)
+            return
+
+        sources = list(EXPORT_SOURCES)
+        titles = [EXPORT_SOURCES[source].title for source in sources]
+        title, ok = QInputDialog.getItem(self, "导出数据表", "选择要导出的数据:", titles, 0, False)
+        if not ok:
+            return
+
+        source = sources[titles.index(title)]
+        file_path = self._choose_export_path("导出数据表", f"{source}.csv")
+        if file_path:
+            self._export_source(source, file_path)
+
     def export_database(self):
-        """导出数据库文件。"""
-        if not self.conn:
+        """导出数据库文件（在后台线程中执行，不影响编辑）。"""
+        if not self.db:
             self.show_message("警告", "请先加载数据库", QMessageBox.Warning)
             return
 
-        try:
-            # 获取当前数据库文件路径
-            current_db_path = self.conn.execute("PRAGMA database_list").fetchone()[2]
-            
-            # 打开保存文件对话框
-            file_path, _ = QFileDialog.getSaveFileName(
-                self,
-                "导出数据库",
-                os.path.join(
-                    self.db_directory or os.path.expanduser("~"),
-                    f"CFS_Teams_Export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-                ),
-                "SQLite 数据库 (*.db);;所有文件 (*.*)"
-            )
+        if self.exporter:
+            self.show_message("警告", "数据库正在导出中，请稍候", QMessageBox.Warning)
+            return
 
-            if not file_path:
-                return
+        # 打开保存文件对话框
+        full_filter = "SQLite 数据库 (*.db)"
+        compact_filter = "压缩导出的 SQLite 数据库 (*.db)"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "导出数据库",
+            os.path.join(
+                self.db_directory or os.path.expanduser("~"),
+                f"CFS_Teams_Export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+            ),
+            f"{full_filter};;{compact_filter};;所有文件 (*.*)"
+        )
 
-            # 确保数据库处于一致状态
-            self.conn.execute("PRAGMA wal_checkpoint(FULL)")
-            
-            # 关闭当前连接
-            self.conn.close()
-            self.conn = None
-            
-            try:
-                # 复制数据库文件
-                import shutil
-                shutil.copy2(current_db_path, file_path)
-                
-                # 如果存在WAL和SHM文件，也复制它们
-                for ext in ['-wal', '-shm']:
-                    src = current_db_path + ext
-                    if os.path.exists(src):
-                        shutil.copy2(src, file_path + ext)
-                
-                self.show_message(
-                    "成功",
-                    f"数据库已导出到:\n{file_path}"
-                )
-                
-                logger.info(f"数据库已导出到: {file_path}")
-                
-            finally:
-                # 重新连接数据库
-                self.conn = sqlite3.connect(current_db_path)
-                self.conn.row_factory = sqlite3.Row
-                self.cursor = self.conn.cursor()
+        if not file_path:
+            return
 
-        except Exception as e:
-            error_msg = f"导出失败：{str(e)}"
-            logger.error(error_msg, exc_info=True)
-            self.show_message("错误", error_msg, QMessageBox.Critical)
-            
-            # 确保重新连接数据库
-            if not self.conn and current_db_path:
-                try:
-                    self.conn = sqlite3.connect(current_db_path)
-                    self.conn.row_factory = sqlite3.Row
-                    self.cursor = self.conn.cursor()
-                except Exception as conn_error:
-                    logger.error(f"重新连接数据库失败: {conn_error}", exc_info=True)
-                    self.show_message(
-                        "严重错误",
-                        "数据库连接已断开，请重新启动应用程序",
-                        QMessageBox.Critical
-                    )
+        self.exporter = DatabaseExporter(self.db, file_path, compact=selected_filter == compact_filter)
+        self.exporter_thread = QThread(self)
+        self.exporter.moveToThread(self.exporter_thread)
+        self.exporter_thread.started.connect(self.exporter.run)
+        self.exporter.progress.connect(self._on_export_progress)
+        self.exporter.finished.connect(self._on_export_finished)
+        self.exporter.failed.connect(self._on_export_failed)
+
+        self.export_db_btn.setEnabled(False)
+        self.export_progress.setRange(0, 0)
+        self.export_progress.show()
+        self.statusBar().showMessage(f"正在导出数据库：{os.path.basename(file_path)}")
+        self.exporter_thread.start()
+
+    def _finish_export(self):
+        """结束后台导出线程。"""
+        self.export_progress.hide()
+        self.export_db_btn.setEnabled(not self.loader)
+        if self.exporter_thread:
+            self.exporter_thread.quit()
+            self.exporter_thread.wait()
+            self.exporter_thread.deleteLater()
+        if self.exporter:
+            self.exporter.deleteLater()
+        self.exporter = None
+        self.exporter_thread = None
+
+    def _on_export_progress(self, done: int, total: int):
+        """更新导出进度（按页）。"""
+        self.export_progress.setRange(0, max(total, 1))
+        self.export_progress.setValue(done)
+
+    def _on_export_finished(self, file_path: str):
+        """后台导出完成。"""
+        self._finish_export()
+        self.statusBar().showMessage(f"数据库已导出到: {file_path}")
+        self.show_message(
+            "成功",
+            f"数据库已导出到:\n{file_path}"
+        )
 
+        logger.info(f"数据库已导出到: {file_path}")
 
-def main():
-    """Run main application."""
-    try:
-        # 尝试创建默认图标，但不要让它阻止程序启动
-        create_default_icon()
-    except Exception as e:
-        logger.error(f"创建图标时发生错误: {e}")
-    
-    app = QApplication(sys.argv)
-    
-    # 设置应用程序全局属性
-    app.setApplicationName("CFS球队编辑器")
-    app.setApplicationVersion("2.0.0")
-    app.setOrganizationName("卡尔纳斯工作室")
-    
-    # 设置现代系统字体
-    default_font = QFont()
-    default_font.setPointSize(10)
-    default_font.setFamily("Microsoft YaHei UI")  # 使用系统UI字体
-    app.setFont(default_font)
-    
-    # 应用Material主题
+    def _on_export_failed(self, error_msg: str):
+        """后台导出失败。"""
+        self._finish_export()
+        self.statusBar().showMessage(error_msg)
+        self.show_message("错误", error_msg, QMessageBox.Critical)
+
+
+def apply_theme(app):
+    """应用Material主题，失败时使用自定义调色板。"""
     try:
+        # qt_material 导入较慢，窗口显示后再加载
+        from qt_material import apply_stylesheet
+
         # 使用蓝色调的主题
         apply_stylesheet(app, theme='light_blue.xml', invert_secondary=True)
     except Exception as e:
@@ -2196,10 +3358,73 @@ def main():
         except Exception as e2:
             logger.warning(f"无法设置调色板: {e2}")
 
+
+def _finish_startup(app, window):
+    """窗口首次显示后应用样式表和主题并输出启动耗时。"""
+    startup_profiler.mark("首次显示")
+    window.setup_style()
+    startup_profiler.mark("窗口样式表")
+    apply_theme(app)
+    startup_profiler.mark("Material主题")
+    startup_profiler.report()
+
+
+def _pop_int_option(name: str, default: int) -> int:
+    """从 sys.argv 中取出 "name N" 或 "name=N" 形式的整数选项。"""
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            value = sys.argv[i + 1]
+            del sys.argv[i:i + 2]
+        elif arg.startswith(name + "="):
+            value = arg[len(name) + 1:]
+            del sys.argv[i]
+        else:
+            continue
+        try:
+            return int(value)
+        except ValueError:
+            logger.warning(f"{name} 的值必须为整数: {value}")
+            return default
+    return default
+
+
+def main():
+    """Run main application."""
+    if "--profile-startup" in sys.argv:
+        sys.argv.remove("--profile-startup")
+        startup_profiler.enabled = True
+    logo_prefetch_depth = _pop_int_option("--prefetch-depth", LOGO_PREFETCH_DEPTH)
+    startup_profiler.mark("导入模块")
+
+    try:
+        # 尝试创建默认图标，但不要让它阻止程序启动
+        create_default_icon()
+    except Exception as e:
+        logger.error(f"创建图标时发生错误: {e}")
+    startup_profiler.mark("默认图标")
+    
+    app = QApplication(sys.argv)
+    
+    # 设置应用程序全局属性
+    app.setApplicationName("CFS球队编辑器")
+    app.setApplicationVersion("2.0.0")
+    app.setOrganizationName("卡尔纳斯工作室")
+    
+    # 设置现代系统字体
+    default_font = QFont()
+    default_font.setPointSize(10)
+    default_font.setFamily("Microsoft YaHei UI")  # 使用系统UI字体
+    app.setFont(default_font)
+    startup_profiler.mark("创建QApplication")
+
     # 创建并显示主窗口
     try:
-        window = TeamDatabaseViewer()
+        window = TeamDatabaseViewer(logo_prefetch_depth)
         window.show()
+        startup_profiler.mark("显示主窗口")
+
+        # 样式表和主题在事件循环开始、窗口绘制之后应用
+        QTimer.singleShot(0, lambda: _finish_startup(app, window))
     
         # 运行应用程序
         sys.exit(app.exec())
@@ -2210,5 +3435,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包后的程序中，批量导入Logo的进程池需要此调用
+    multiprocessing.freeze_support()
     main()
 
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Whole-database rebalancing of staff ability and fame.
+
+Ability, fame and the wealth of the employing team are read in chunks
+into NumPy arrays; a rebalance is a list of vectorised steps (linear
+rescale, percentile mapping onto target values, scaling by team wealth,
+clamping) applied to the whole column at once. Only the rows whose value
+changes are written back. NumPy is optional: without it the rest of the
+editor works and ``require_numpy`` raises ``RebalanceError``. Qt-free.
+"""
+
+import logging
+import sqlite3
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger("TeamEditor.rebalance")
+
+REBALANCE_CHUNK_SIZE = 20000
+
+HISTOGRAM_BINS = 40
+
+# 可以重新平衡的员工字段
+REBALANCE_FIELDS = {"ability": "能力值", "fame": "知名度"}
+
+# 非数值的能力值、知名度和财富读取为NULL（NaN），这些行不会被修改
+_STAFF_ARRAYS_QUERY = """
+    SELECT S.ID,
+           CASE WHEN json_valid(S.AbilityJSON)
+                 AND json_type(S.AbilityJSON, '$.rawAbility') IN ('integer', 'real')
+                THEN json_extract(S.AbilityJSON, '$.rawAbility') END,
+           CASE WHEN typeof(S.Fame) IN ('integer', 'real') THEN S.Fame END,
+           CASE WHEN typeof(T.TeamWealth) IN ('integer', 'real') THEN T.TeamWealth END
+    FROM Staff S LEFT JOIN Teams T ON T.ID = S.EmployedTeamID
+    ORDER BY S.ID
+"""
+
+
+class RebalanceError(ValueError):
+    """Raised when a rebalance cannot be computed."""
+
+
+def require_numpy():
+    """Raise RebalanceError if NumPy is not installed."""
+    if np is None:
+        raise RebalanceError("重新平衡需要安装 numpy（pip install numpy）")
+
+
+class StaffArrays:
+    """Staff columns as parallel arrays ordered by staff ID."""
+
+    def __init__(self, ids, ability, fame, wealth):
+        self.ids = ids
+        self.ability = ability
+        self.fame = fame
+        self.wealth = wealth
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection, chunk_size: int = REBALANCE_CHUNK_SIZE) -> "StaffArrays":
+        """Read the whole Staff table in chunks."""
+        require_numpy()
+        # 每列一个分块列表：ID为int64（超过2**53的ID不经过float64），其余为float64
+        chunks = [[], [], [], []]
+        cursor = conn.cursor()
+        try:
+            cursor.execute(_STAFF_ARRAYS_QUERY)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                columns = list(zip(*rows))
+                chunks[0].append(np.fromiter(columns[0], dtype=np.int64, count=len(rows)))
+                for column, values in zip(chunks[1:], columns[1:]):
+                    # None 转换为 NaN
+                    column.append(np.array(values, dtype=np.float64))
+        finally:
+            cursor.close()
+
+        if not chunks[0]:
+            return cls(np.empty(0, dtype=np.int64), *(np.empty(0, dtype=np.float64) for _ in range(3)))
+        return cls(*(np.concatenate(column) for column in chunks))
+
+    def values(self, field: str):
+        """Return the array of a field in REBALANCE_FIELDS."""
+        if field not in REBALANCE_FIELDS:
+            raise RebalanceError(f"不支持的字段: {field}")
+        return getattr(self, field)
+
+
+class Rebalance:
+    """An ordered list of vectorised transforms of one staff field.
+
+    The builder methods return self, so a rebalance reads like
+    ``Rebalance("ability").percentile_map([(0, 20), (100, 180)]).clamp(1, 200)``.
+    """
+
+    def __init__(self, field: str = "ability"):
+        if field not in REBALANCE_FIELDS:
+            raise RebalanceError(f"不支持的字段: {field}")
+        self.field = field
+        self.steps: List[Tuple[str, tuple]] = []
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def linear(self, scale: float = 1.0, offset: float = 0.0) -> "Rebalance":
+        """value * scale + offset."""
+        self.steps.append(("linear", (float(scale), float(offset))))
+        return self
+
+    def percentile_map(self, anchors: Sequence[Tuple[float, float]]) -> "Rebalance":
+        """Map each value's percentile rank onto target values.
+
+        anchors are (percentile 0-100, target value) pairs; ranks between
+        anchors are interpolated linearly, so [(0, 20), (100, 180)] spreads
+        the field uniformly over 20-180 while keeping the order of staff.
+        """
+        anchors = sorted((float(p), float(v)) for p, v in anchors)
+        if len(anchors) < 2:
+            raise RebalanceError("百分位映射至少需要两个锚点")
+        if anchors[0][0] < 0 or anchors[-1][0] > 100:
+            raise RebalanceError("百分位必须在 0 到 100 之间")
+        self.steps.append(("percentile", tuple(anchors)))
+        return self
+
+    def scale_by_wealth(self, exponent: float) -> "Rebalance":
+        """Multiply by (team wealth / median team wealth) ** exponent.
+
+        Staff without a team (or whose team has no positive wealth) are
+        left unscaled.
+        """
+        self.steps.append(("wealth", (float(exponent),)))
+        return self
+
+    def clamp(self, low: Optional[float] = None, high: Optional[float] = None) -> "Rebalance":
+        """Limit values to [low, high]; None leaves that side open."""
+        if low is not None and high is not None and low > high:
+            raise RebalanceError("下限不能大于上限")
+        self.steps.append(("clamp", (low, high)))
+        return self
+
+    def describe(self) -> str:
+        """Return a readable summary of the steps."""
+        parts = []
+        for name, args in self.steps:
+            if name == "linear":
+                parts.append(f"×{args[0]:g} {args[1]:+g}")
+            elif name == "percentile":
+                parts.append("百分位映射 " + ", ".join(f"P{p:g}→{v:g}" for p, v in args))
+            elif name == "wealth":
+                parts.append(f"按球队财富缩放 (指数 {args[0]:g})")
+            else:
+                low, high = args
+                parts.append(f"限制在 {'-∞' if low is None else f'{low:g}'} ~ "
+                             f"{'∞' if high is None else f'{high:g}'}")
+        return f"{REBALANCE_FIELDS[self.field]}: " + " → ".join(parts)
+
+    def apply(self, arrays: StaffArrays):
+        """Return the new integer values of every staff as a float array.
+
+        Rows whose current value is NaN stay NaN and are never written.
+        """
+        require_numpy()
+        values = arrays.values(self.field).copy()
+        valid = ~np.isnan(values)
+        for name, args in self.steps:
+            if name == "linear":
+                values = values * args[0] + args[1]
+            elif name == "percentile":
+                values[valid] = _percentile_map(values[valid], args)
+            elif name == "wealth":
+                values = values * _wealth_factors(arrays.wealth, args[0])
+            elif name == "clamp":
+                values = np.clip(values, args[0], args[1])
+
+        # 与 SQLite ROUND() 一致，半数远离零取整；能力值和知名度不为负
+        values = np.sign(values) * np.floor(np.abs(values) + 0.5)
+        values = np.clip(values, 0, None)
+        values[~valid] = np.nan
+        return values
+
+    def changed_rows(self, arrays: StaffArrays, new_values) -> List[Tuple[int, int]]:
+        """Return (staff ID, new value) of the rows apply() changed."""
+        old_values = arrays.values(self.field)
+        changed = ~np.isnan(new_values) & (new_values != old_values)
+        return list(zip(arrays.ids[changed].tolist(), new_values[changed].astype(np.int64).tolist()))
+
+
+def _percentile_map(values, anchors):
+    """Map values to targets by their percentile rank (ties share a rank)."""
+    count = len(values)
+    if count == 0:
+        return values
+    if count == 1:
+        ranks = np.array([50.0])
+    else:
+        ordered = np.sort(values)
+        first = np.searchsorted(ordered, values, side="left")
+        last = np.searchsorted(ordered, values, side="right") - 1
+        ranks = (first + last) / 2 / (count - 1) * 100
+    percentiles, targets = zip(*anchors)
+    return np.interp(ranks, percentiles, targets)
+
+
+def _wealth_factors(wealth, exponent: float):
+    """Return the per-staff scale factors of scale_by_wealth."""
+    positive = ~np.isnan(wealth) & (wealth > 0)
+    factors = np.ones_like(wealth)
+    if positive.any():
+        median = np.median(wealth[positive])
+        factors[positive] = (wealth[positive] / median) ** exponent
+    return factors
+
+
+def histogram(before, after, bins: int = HISTOGRAM_BINS):
+    """Return (bin edges, counts before, counts after) over a shared range."""
+    require_numpy()
+    before = before[~np.isnan(before)]
+    after = after[~np.isnan(after)]
+    combined = np.concatenate([before, after])
+    if combined.size == 0:
+        edges = np.linspace(0, 1, bins + 1)
+    else:
+        low, high = float(combined.min()), float(combined.max())
+        edges = np.linspace(low, high if high > low else low + 1, bins + 1)
+    return edges, np.histogram(before, edges)[0], np.histogram(after, edges)[0]
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Team search index and structured team queries.
+
+Keeps one normalized search key per team, built once at load time and
+updated on edit. Large databases additionally get a trigram inverted
+index so that substring search only verifies candidate records instead
+of scanning all of them.
+
+Structured queries such as ``league:3 wealth>5000 year<1950 name:~城``
+compile either to a parameterised SQL WHERE clause against Teams or to
+column predicates evaluated over the in-memory records. Qt-free.
+"""
+
+import logging
+import math
+import operator
+import re
+from itertools import compress, repeat
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from cfs_database import TeamRecord, TEAM_FIELDS, TEAM_FIELD_ATTRS, TEAM_NUMERIC_FIELDS
+
+logger = logging.getLogger("TeamEditor.search")
+
+# 查询中可用的字段简写
+QUERY_FIELD_ALIASES = {
+    "id": "ID",
+    "name": "TeamName",
+    "wealth": "TeamWealth",
+    "year": "TeamFoundYear",
+    "location": "TeamLocation",
+    "supporters": "SupporterCount",
+    "stadium": "StadiumName",
+    "nickname": "Nickname",
+    "league": "BelongingLeague",
+}
+QUERY_FIELD_ALIASES.update({field.lower(): field for field in TEAM_FIELDS})
+
+QUERY_NUMERIC_FIELDS = {"ID", "BelongingLeague", *TEAM_NUMERIC_FIELDS}
+
+CONTAINS_OP = ":~"
+
+# 运算符 -> (Python比较函数, SQL运算符)
+QUERY_OPERATORS = {
+    ":": (operator.eq, "="),
+    "=": (operator.eq, "="),
+    "!=": (operator.ne, "IS NOT"),
+    ">": (operator.gt, ">"),
+    ">=": (operator.ge, ">="),
+    "<": (operator.lt, "<"),
+    "<=": (operator.le, "<="),
+    CONTAINS_OP: (operator.contains, None),
+}
+
+_QUERY_TOKEN_RE = re.compile(r'(?:[^\s"]+|"[^"]*")+')
+_QUERY_CONDITION_RE = re.compile(r'^([A-Za-z]+)(:~|>=|<=|!=|:|=|>|<)(.+)$')
+
+# SQL中与 TeamRecord.as_search_string() 对应的表达式
+_SQL_SEARCH_STRING = " || char(10) || ".join(
+    f"COALESCE(T.{field}, 'None')" for field in TEAM_FIELDS
+)
+
+
+class QuerySyntaxError(ValueError):
+    """Raised when a structured team query cannot be parsed."""
+
+
+def normalize_search_text(text: str) -> str:
+    """Normalize text for case-insensitive substring matching."""
+    return text.casefold()
+
+
+class FieldPredicate:
+    """A single ``field op value`` condition of a team query."""
+
+    def __init__(self, field: str, op: str, value: Any):
+        self.field = field
+        self.op = op
+        self.value = value
+        self.compare = QUERY_OPERATORS[op][0]
+
+    def __repr__(self) -> str:
+        return f"FieldPredicate({self.field!r}, {self.op!r}, {self.value!r})"
+
+    def to_sql(self) -> Tuple[str, List[Any]]:
+        """Return the SQL condition and its parameters."""
+        column = f"T.{self.field}"
+        if self.op == CONTAINS_OP:
+            return f"instr(lower({column}), ?) > 0", [self.value]
+        return f"{column} {QUERY_OPERATORS[self.op][1]} ?", [self.value]
+
+
+class TeamQuery:
+    """Parsed team query: field predicates plus free-text terms."""
+
+    def __init__(self, predicates: List[FieldPredicate], terms: List[str]):
+        self.predicates = predicates
+        self.terms = terms
+
+    @property
+    def is_structured(self) -> bool:
+        """Whether the query contains any field predicate."""
+        return bool(self.predicates)
+
+    def to_sql(self, terms: bool = True) -> Tuple[str, List[Any]]:
+        """Compile to a parameterised WHERE clause over ``Teams T``.
+
+        With terms=False only the field predicates are compiled, for
+        callers that match the free-text terms through the search index.
+        """
+        clauses = []
+        params: List[Any] = []
+        for predicate in self.predicates:
+            clause, clause_params = predicate.to_sql()
+            clauses.append(clause)
+            params.extend(clause_params)
+        for term in self.terms if terms else ():
+            clauses.append(f"instr(lower({_SQL_SEARCH_STRING}), ?) > 0")
+            params.append(term.lower())
+        return " AND ".join(clauses), params
+
+
+def _parse_query_value(field: str, op: str, text: str) -> Any:
+    """Convert the value of a condition to the type of its field."""
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        text = text[1:-1]
+
+    if op == CONTAINS_OP:
+        if field in QUERY_NUMERIC_FIELDS:
+            raise QuerySyntaxError(f"数值字段 {field} 不支持 {CONTAINS_OP}")
+        return text.lower()
+
+    if field not in QUERY_NUMERIC_FIELDS:
+        return text
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        raise QuerySyntaxError(f"{field} 的值必须是数字: {text}")
+
+
+def parse_team_query(text: str) -> TeamQuery:
+    """Parse a query such as ``league:3 wealth>5000 year<1950 name:~城``.
+
+    Tokens whose field name is unknown are kept as free-text terms.
+    """
+    predicates = []
+    terms = []
+    for token in _QUERY_TOKEN_RE.findall(text):
+        match = _QUERY_CONDITION_RE.match(token)
+        field = QUERY_FIELD_ALIASES.get(match.group(1).lower()) if match else None
+        if field is None:
+            terms.append(token.replace('"', ''))
+            continue
+        op = match.group(2)
+        predicates.append(FieldPredicate(field, op, _parse_query_value(field, op, match.group(3))))
+    return TeamQuery(predicates, terms)
+
+
+class TeamSearchIndex:
+    """Substring search over TeamRecord.as_search_string()."""
+
+    NGRAM_SIZE = 3
+    NGRAM_MIN_RECORDS = 20000  # 小数据库直接扫描搜索键即可
+
+    def __init__(self, records: Sequence[TeamRecord] = ()):
+        self.records: List[TeamRecord] = list(records)
+        self._position: Dict[int, int] = {r.id: i for i, r in enumerate(self.records)}
+        self._keys: List[str] = [
+            normalize_search_text(r.as_search_string()) for r in self.records
+        ]
+        self._postings: Optional[Dict[str, List[int]]] = None
+        if len(self.records) >= self.NGRAM_MIN_RECORDS:
+            self._build_postings()
+
+        # 按需建立的列存储，供结构化查询使用
+        self._columns: Dict[Tuple[str, bool], List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _ngrams(self, text: str) -> set:
+        """Return the set of n-grams of a normalized string."""
+        n = self.NGRAM_SIZE
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def _build_postings(self):
+        """Build the n-gram -> record positions inverted index."""
+        postings: Dict[str, List[int]] = {}
+        for pos, key in enumerate(self._keys):
+            for gram in self._ngrams(key):
+                posting = postings.get(gram)
+                if posting is None:
+                    postings[gram] = [pos]
+                else:
+                    posting.append(pos)
+        self._postings = postings
+        logger.info(f"已建立球队搜索索引: {len(self.records)} 条记录, {len(postings)} 个n-gram")
+
+    def update(self, record: TeamRecord):
+        """Refresh the search key of an edited record."""
+        pos = self._position.get(record.id)
+        if pos is None:
+            return
+        key = normalize_search_text(record.as_search_string())
+        self._keys[pos] = key
+        for (field, lowered), column in self._columns.items():
+            column[pos] = self._column_value(record, field, lowered)
+        if self._postings is not None:
+            # 旧的n-gram条目保留即可，候选记录最终都会用搜索键校验
+            for gram in self._ngrams(key):
+                self._postings.setdefault(gram, []).append(pos)
+
+    def _positions_of(self, records: Sequence[TeamRecord]) -> List[int]:
+        """Return the index positions of records, skipping those not indexed."""
+        position = self._position
+        return [pos for pos in (position.get(r.id) for r in records) if pos is not None]
+
+    def _candidates(self, term: str) -> Optional[Iterable[int]]:
+        """Return candidate positions from the n-gram index, or None to scan."""
+        if self._postings is None or len(term) < self.NGRAM_SIZE:
+            return None
+
+        lists = sorted(
+            (self._postings.get(gram, ()) for gram in self._ngrams(term)),
+            key=len
+        )
+        if not lists[0]:
+            return ()
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return sorted(candidates)
+
+    def search(self, term: str, within: Optional[Sequence[TeamRecord]] = None) -> List[TeamRecord]:
+        """Return the records whose search key contains term, in load order.
+
+        When within is given (the results of a shorter query that term
+        extends), only those records are checked and their order is kept;
+        records of within that are not in the index are skipped.
+        """
+        term = normalize_search_text(term)
+        if not term:
+            return list(self.records if within is None else within)
+
+        keys = self._keys
+        if within is not None:
+            return [self.records[pos] for pos in self._positions_of(within) if term in keys[pos]]
+
+        candidates = self._candidates(term)
+        if candidates is None:
+            return [r for r, key in zip(self.records, keys) if term in key]
+        return [self.records[pos] for pos in candidates if term in keys[pos]]
+
+    @staticmethod
+    def _column_value(record: TeamRecord, field: str, lowered: bool) -> Any:
+        """Return the comparable column value of a record."""
+        value = getattr(record, TEAM_FIELD_ATTRS[field])
+        if field in QUERY_NUMERIC_FIELDS:
+            # 空值或非数字用NaN表示，所有比较均不成立
+            if isinstance(value, (int, float)):
+                return value
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return math.nan
+        text = "" if value is None else str(value)
+        return text.lower() if lowered else text
+
+    def _column(self, field: str, lowered: bool = False) -> List[Any]:
+        """Return (building on first use) the column of a field."""
+        column = self._columns.get((field, lowered))
+        if column is None:
+            column = [self._column_value(r, field, lowered) for r in self.records]
+            self._columns[(field, lowered)] = column
+        return column
+
+    def query(self, team_query: TeamQuery,
+              within: Optional[Sequence[TeamRecord]] = None) -> List[TeamRecord]:
+        """Evaluate a structured query column by column, in load order."""
+        if within is None:
+            positions: Iterable[int] = range(len(self.records))
+        else:
+            positions = self._positions_of(within)
+
+        for predicate in team_query.predicates:
+            column = self._column(predicate.field, predicate.op == CONTAINS_OP)
+            matches = map(
+                predicate.compare,
+                map(column.__getitem__, positions),
+                repeat(predicate.value)
+            )
+            positions = list(compress(positions, matches))
+
+        keys = self._keys
+        for term in team_query.terms:
+            term = normalize_search_text(term)
+            positions = [pos for pos in positions if term in keys[pos]]
+
+        return [self.records[pos] for pos in positions]